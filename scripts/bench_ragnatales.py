@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the fetch_ragnatales.py classification/export pipeline.
+Replays yt-dlp JSON fixtures seeded from output/ragnatales_videos.json,
+synthetically scaled, with stubbed thumbnail responses (no network, no yt-dlp).
+
+Usage:
+    python bench_ragnatales.py                       # 10k e 100k vídeos
+    python bench_ragnatales.py --sizes 1000,10000    # Tamanhos personalizados
+    python bench_ragnatales.py --compare output/bench/bench-20260101-120000.json
+"""
+
+import contextlib
+import io
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import fetch_ragnatales as fr
+
+# ─── Config ───────────────────────────────────────────────────────────────────
+
+BENCH_DIR = fr.OUTPUT_DIR / "bench"
+DEFAULT_SIZES = [10_000, 100_000]
+
+
+# ─── Fixtures ─────────────────────────────────────────────────────────────────
+
+def seed_videos() -> list[dict]:
+    """Turn the exported catalog back into yt-dlp-shaped video dicts."""
+    with open(fr.OUTPUT_JSON, encoding="utf-8") as f:
+        data = json.load(f)
+    entries = [e for builds in data["classes"].values() for e in builds]
+    entries += data["uncategorized"]
+    return [
+        {
+            "id": e["id"],
+            "title": e["title"],
+            "description": e["description"],
+            "tags": e["tags"],
+            "upload_date": e["uploadDate"].replace("-", ""),
+        }
+        for e in entries
+    ]
+
+
+def fixture_path(size: int) -> Path:
+    return BENCH_DIR / f"fixtures-{size}.jsonl"
+
+
+def ensure_fixture(size: int) -> Path:
+    """Write `size` synthetic yt-dlp JSON lines, cycling through the seed."""
+    path = fixture_path(size)
+    if path.exists():
+        return path
+    seed = seed_videos()
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(size):
+            video = dict(seed[i % len(seed)])
+            video["id"] = f"{video['id']}-{i}"
+            video["upload_date"] = f"20{20 + i % 6}{i % 12 + 1:02d}{i % 28 + 1:02d}"
+            f.write(json.dumps(video, ensure_ascii=False) + "\n")
+    return path
+
+
+def replay_fixture(path: Path):
+    """Yield fixture entries the way stream_channel_videos yields yt-dlp output."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, url: str):
+        # Deterministic mix of real and placeholder maxres thumbnails
+        self.headers = {"content-length": "5000" if len(url) % 3 else "1000"}
+
+
+class StubSession:
+    """Stands in for requests.Session in resolve_thumbnails."""
+
+    def head(self, url, **kwargs):
+        return StubResponse(url)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# ─── Measurement ──────────────────────────────────────────────────────────────
+
+def measure(func, *args, **kwargs) -> tuple[object, dict]:
+    """Run `func` twice with stdout silenced: untraced for the wall time, then
+    under tracemalloc for the peak memory (tracing slows allocation-heavy code
+    down unevenly, so it would skew timings). Returns the first run's result,
+    its wall time and the second run's peak memory; `args` must be reusable.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return result, {"seconds": round(seconds, 4), "peakMemoryBytes": peak}
+
+
+def classify_all(videos: list[dict]):
+    for video in videos:
+        fr.detect_class(video)
+        fr.detect_content_category(video)
+
+
+def bench_size(size: int) -> dict:
+    """Benchmark every stage for one catalog size."""
+    path = ensure_fixture(size)
+    videos = list(replay_fixture(path))
+    stages = {}
+
+    _, stages["classification"] = measure(classify_all, videos)
+    stages["classification"]["perVideoMicros"] = round(
+        stages["classification"]["seconds"] / size * 1e6, 2
+    )
+
+    # A fresh replay per run: the fixture stream is consumed
+    data, stages["process_videos"] = measure(
+        lambda: fr.process_videos(replay_fixture(path), thumb_cache=None)
+    )
+
+    outputs = fr.OUTPUT_DIR, fr.OUTPUT_JSON, fr.OUTPUT_TS
+    with tempfile.TemporaryDirectory() as tmp:
+        fr.OUTPUT_DIR = Path(tmp)
+        fr.OUTPUT_JSON = Path(tmp) / "ragnatales_videos.json"
+        fr.OUTPUT_TS = Path(tmp) / "constants_generated.ts"
+        try:
+            # A scratch hash cache, so the bench never touches output/cache
+            hashes = Path(tmp) / fr.OUTPUT_HASHES.name
+            _, stages["save_json"] = measure(fr.save_json, data, hashes_path=hashes)
+            _, stages["generate_typescript"] = measure(
+                fr.generate_typescript, data, hashes_path=hashes
+            )
+            stages["generate_typescript"]["outputBytes"] = fr.OUTPUT_TS.stat().st_size
+        finally:
+            fr.OUTPUT_DIR, fr.OUTPUT_JSON, fr.OUTPUT_TS = outputs
+
+    return {"size": size, "stages": stages}
+
+
+def print_results(results: list[dict], baseline: dict | None):
+    previous = {}
+    if baseline:
+        previous = {
+            (r["size"], stage): m["seconds"]
+            for r in baseline["results"] for stage, m in r["stages"].items()
+        }
+    for result in results:
+        print(f"\n  {result['size']} vídeos")
+        for stage, m in result["stages"].items():
+            line = f"    - {stage:<20} {m['seconds']:>9.3f}s  pico {m['peakMemoryBytes'] / 1e6:>8.1f} MB"
+            if "perVideoMicros" in m:
+                line += f"  ({m['perVideoMicros']} µs/vídeo)"
+            old = previous.get((result["size"], stage))
+            if old:
+                line += f"  [{(m['seconds'] - old) / old * 100:+.1f}% vs base]"
+            print(line)
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main():
+    sizes_arg = fr.get_flag_value("--sizes")
+    sizes = [int(s) for s in sizes_arg.split(",")] if sizes_arg else DEFAULT_SIZES
+    compare = fr.get_flag_value("--compare")
+
+    # Stubbed thumbnail probing: the bench measures our code, not the network
+    fr.make_http_session = lambda pool_size=0: StubSession()
+    # ...and no per-host rate limits either (rate 0 means unlimited)
+    fr.configure_rate_limits({host: {"rate": 0} for host in fr.HOST_LIMITS})
+
+    print(f"Benchmark offline: {', '.join(str(s) for s in sizes)} vídeos")
+    results = [bench_size(size) for size in sizes]
+
+    report = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    out = BENCH_DIR / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if compare:
+        with open(compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"\nResultados salvos em: {out}")
+
+
+if __name__ == "__main__":
+    main()
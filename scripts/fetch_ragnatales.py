@@ -6,24 +6,173 @@ Classifies by class/build, checks thumbnails, and exports JSON + optional TS.
 Usage:
     python fetch_ragnatales.py                # Gera JSON
     python fetch_ragnatales.py --generate-ts  # Gera JSON + constants_generated.ts
+    python fetch_ragnatales.py --generate-ts --compact-ts  # TS compacto (colunas + JSON.parse)
+    python fetch_ragnatales.py --generate-ts --ts-chunks  # + um chunk por classe/categoria e índice de busca
+    python fetch_ragnatales.py --workers 8    # Metadados completos com 8 processos yt-dlp
+    python fetch_ragnatales.py --batch-size 50  # 50 vídeos por processo yt-dlp (1 = um por vídeo)
+    python fetch_ragnatales.py --incremental  # Só busca vídeos novos ou com cache expirado
+    python fetch_ragnatales.py --thumb-workers 32  # Verificação de thumbnails em paralelo
+    python fetch_ragnatales.py --mirror-thumbnails  # Baixa as thumbnails e gera versões WebP/AVIF (requer Pillow)
+    python fetch_ragnatales.py --profile      # Roda sob cProfile e salva output/profile.pstats
+    python fetch_ragnatales.py --trace --trace-top 30  # Custo por vídeo, pico de memória e pilhas para flamegraph
+    python fetch_ragnatales.py --exit-code    # Sai com código 3 se nenhuma saída mudou
+    python fetch_ragnatales.py --jobs jobs.json  # Vários canais/jogos em paralelo (ver jobs.example.json)
+    python fetch_ragnatales.py --query class=Paladino,since=2024-01-01  # Consulta o banco local
+    python fetch_ragnatales.py --async        # Etapas simultâneas ligadas por filas limitadas
+    python fetch_ragnatales.py --record output/fixtures  # Grava as saídas do yt-dlp e das thumbnails
+    python fetch_ragnatales.py --replay output/fixtures  # Roda offline a partir do que foi gravado
+    python fetch_ragnatales.py --resume       # Retoma uma execução interrompida a partir do journal
+    python fetch_ragnatales.py --watch --watch-interval 300 --watch-newest 15  # Vigia o canal e só processa vídeos novos
+    python fetch_ragnatales.py --watch --feed-url "https://www.youtube.com/feeds/videos.xml?channel_id=..."  # Vigia pelo RSS
+    python fetch_ragnatales.py --backfill dump1.jsonl,dump2.jsonl  # Classifica dumps do yt-dlp em vários processos
+    python fetch_ragnatales.py --verify-classifier output/ragnatales_videos.json  # Compara com a classificação atual
+    python fetch_ragnatales.py --explain abc123,def456  # Mostra os padrões por trás de cada pontuação (ou --explain all)
+    python fetch_ragnatales.py --rate-limit www.youtube.com=2:10:4  # host=req/s[:burst[:concorrência]]
 """
 
+import asyncio
+import contextlib
+import cProfile
+import hashlib
 import json
+import pstats
 import re
+import sqlite3
 import sys
 import os
 import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+import unicodedata
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, NamedTuple
 
 import requests
 
+try:
+    from PIL import Image
+except ImportError:  # Optional: only --mirror-thumbnails needs Pillow
+    Image = None
+
 # ─── Config ───────────────────────────────────────────────────────────────────
 
 CHANNEL_URL = "https://www.youtube.com/@gekigaming"
 OUTPUT_DIR = Path(__file__).parent / "output"
 OUTPUT_JSON = OUTPUT_DIR / "ragnatales_videos.json"
 OUTPUT_TS = Path(__file__).parent.parent / "constants_generated.ts"
+# Indexed local catalog; the JSON and TS exports are generated from it
+VIDEO_DB = OUTPUT_DIR / "ragnatales_videos.sqlite"
+
+# Full-metadata fetch: parallel yt-dlp processes and retry policy per video
+METADATA_WORKERS = 4
+METADATA_RETRIES = 2
+# Video IDs passed to a single yt-dlp process, so startup is paid once per batch
+METADATA_BATCH_SIZE = 25
+
+# --backfill: videos per chunk sent to a classification process; below one
+# chunk the pool is not worth starting and classification runs inline
+BACKFILL_CHUNK_SIZE = 500
+
+# --async pipeline: capacity of each queue between stages (backpressure), and
+# how often a listing blocked on a full queue checks whether a stage failed
+ASYNC_QUEUE_SIZE = 64
+ASYNC_STOP_POLL_SECONDS = 0.1
+RETRY_BACKOFF_SECONDS = 2.0
+
+# Outbound request limits per host: sustained requests per second, burst size
+# and the ceiling of the adaptive concurrency limit (None: whatever the worker
+# pool runs, until throttled). A yt-dlp process costs one request per video.
+# Unlisted hosts are not limited; override with --rate-limit.
+HOST_LIMITS = {
+    "www.youtube.com": {"rate": 5.0, "burst": METADATA_BATCH_SIZE, "concurrency": None},
+    "img.youtube.com": {"rate": 100.0, "burst": 50, "concurrency": None},
+}
+# yt-dlp stderr fragments that mean YouTube is throttling (or timing out) us
+THROTTLE_MARKERS = ("HTTP Error 429", "Too Many Requests", "rate-limit", "not a bot", "timed out")
+THROTTLE_STATUS = {429, 503}
+# Seconds between two concurrency decreases, so one burst of errors halves once
+THROTTLE_COOLDOWN_SECONDS = 5.0
+
+# Per-video cache (metadata, thumbnail, classification) used by --incremental
+CACHE_DIR = OUTPUT_DIR / "cache"
+VIDEO_CACHE = CACHE_DIR / "videos.json"
+CACHE_TTL_DAYS = 7
+
+# Thumbnail probing: concurrent HEAD requests over one pooled session,
+# decisions persisted so each video is only probed once
+THUMBNAIL_WORKERS = 16
+THUMBNAIL_CACHE = CACHE_DIR / "thumbnails.json"
+
+# Watch mode (--watch): poll the newest uploads on a schedule and only push
+# new or edited videos through the pipeline. Polls read the channel's RSS feed
+# when a feed URL is given, else a yt-dlp listing cut at --playlist-end.
+# The state file keeps a text key per polled video to diff against.
+WATCH_INTERVAL_SECONDS = 600
+WATCH_NEWEST = 15
+WATCH_STATE = CACHE_DIR / "watch.json"
+FEED_NAMESPACES = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "yt": "http://www.youtube.com/xml/schemas/2015",
+    "media": "http://search.yahoo.com/mrss/",
+}
+
+# Classification decisions keyed by a hash of the video's text, each stored
+# with the fingerprint of the rule tables it was made under
+DECISION_CACHE = CACHE_DIR / "decisions.json"
+
+# Thumbnail mirroring (--mirror-thumbnails): originals are downloaded once and
+# kept by content hash; resized derivatives go to the site's public/ directory
+THUMBNAIL_MIRROR = CACHE_DIR / "thumbnail_mirror.json"
+THUMBNAIL_ORIGINALS = CACHE_DIR / "thumbnail_originals"
+THUMBNAIL_MIRROR_DIR = Path(__file__).parent.parent / "public" / "thumbnails"
+THUMBNAIL_MIRROR_URL = "/thumbnails/{name}"
+# Derivative widths (never upscaled) and formats, best first; formats the
+# installed Pillow cannot encode are skipped
+THUMBNAIL_DERIVATIVES = {"card": 480, "modal": 1280}
+THUMBNAIL_FORMATS = ("avif", "webp")
+THUMBNAIL_QUALITY = 70
+
+# TypeScript export: write buffer size, and URL patterns the compact layout
+# rebuilds on the client from the video ID
+TS_WRITE_BUFFER = 1 << 16
+THUMBNAIL_URL = "https://img.youtube.com/vi/{id}/{size}.jpg"
+VIDEO_URL = "https://www.youtube.com/watch?v={id}"
+TS_AUTHOR = "GekiGaming"
+
+# Checkpoint journal of the current run (listing, metadata and thumbnail
+# results as they finish); --resume picks an interrupted run up from it
+JOURNAL = CACHE_DIR / "journal.jsonl"
+
+# Content hashes of the exported files; unchanged outputs are not rewritten.
+# Lines with these prefixes only carry the run date and are left out of the hash.
+OUTPUT_HASHES = CACHE_DIR / "output_hashes.json"
+JSON_VOLATILE_PREFIXES = ('  "fetchDate": ',)
+TS_VOLATILE_PREFIXES = ("// Generated on: ",)
+# Exit status of --exit-code runs that left every output untouched
+EXIT_UNCHANGED = 3
+
+# Run instrumentation
+METRICS_JSON = OUTPUT_DIR / "metrics.json"
+PROFILE_STATS = OUTPUT_DIR / "profile.pstats"
+# --trace: per-video costs and memory peaks, sampled call stacks in collapsed
+# format (input for flamegraph.pl or speedscope), how many of the slowest
+# videos to list, and the sampling interval
+TRACE_JSON = OUTPUT_DIR / "trace.json"
+TRACE_STACKS = OUTPUT_DIR / "trace.collapsed"
+TRACE_TOP = 20
+TRACE_SAMPLE_SECONDS = 0.01
+
+# yt-dlp fields the pipeline actually reads; everything else is dropped
+METADATA_FIELDS = ("id", "title", "description", "tags", "upload_date")
 
 # Keywords that identify a RagnaTales video
 RAGNATALES_KEYWORDS = [
@@ -40,6 +189,9 @@ RAGNATALES_TAGS = {
 
 # ─── Class Detection ─────────────────────────────────────────────────────────
 
+# All pattern tables are matched on tokens with case, accents and hyphens
+# folded (see tokenize), so each spelling only needs to be listed once.
+
 CLASS_ALIASES = {
     "Atirador de Elite": [
         "atirador de elite", "sniper", "atirador", "arqueiro",
@@ -68,7 +220,7 @@ CLASS_ALIASES = {
         "tornado de carrinho", "terror ácido",
     ],
     "Mestre-Ferreiro": [
-        "mestre-ferreiro", "mestre ferreiro", "whitesmith",
+        "mestre-ferreiro", "whitesmith",
         "blacksmith", "ferreiro", "cart termination",
         "mammonite", "over thrust", "martelo de thor",
     ],
@@ -125,6 +277,20 @@ CLASS_ALIASES = {
     ],
 }
 
+# Titles with these mention many classes but aren't about any single one
+GENERIC_PATTERNS = [
+    "tier list", "melhores classes", "melhor classe",
+    "todas as vocações", "todas as classes",
+]
+
+# Aliases up to this length must match whole words ("bash" not in "bashing");
+# longer patterns also match the start of a word ("arqueiro" in "arqueiros")
+SHORT_ALIAS_MAX_LEN = 7
+
+# Part of the rule fingerprint (see Classifier.fingerprint): bump it when the
+# matching or scoring code changes, so cached decisions are recomputed
+CLASSIFIER_REVISION = 1
+
 # Subcategory mapping (class → base job tree)
 SUBCATEGORY_MAP = {
     "Atirador de Elite": "Arqueiro",
@@ -152,20 +318,19 @@ SUBCATEGORY_MAP = {
 # Series detection runs FIRST (highest priority) - matches exact series titles
 SERIES_PATTERNS = {
     "Do Zero ao RMT - Ragnatales": [
-        "rmt do zero", "rmt do zero -",
+        "rmt do zero",
         "renda extra na prática",
         "reserva de emergência",
         "ganhe dinheiro jogando",
         "verdade sobre o rmt",
     ],
     "Pai de Família": [
-        "do zero à chefênia", "do zero a chefenia",
+        "do zero à chefênia",
         "comecei do zero",
         "jornada das sombras",
         "guia de progressão do pai de família",
         "progressão do pai de família",
         "pai de família",
-        "pai de familia",
         "nosso segundo dia do zero",
         "nossa primeira semana do zero",
     ],
@@ -189,48 +354,1131 @@ CATEGORY_PATTERNS = {
         "patch notes", "changelog",
         "novidades para personagens", "patch note",
         "novo sistema", "mapas especiais",
-        "changelog ",  # with trailing space to avoid false matches
     ],
 }
 
+# Category patterns whose hits count more than once. "changelog" was listed
+# twice (plain and with a trailing space), so a changelog weighs double
+CATEGORY_PATTERN_WEIGHTS = {"changelog": 2}
+
 
 def detect_content_category(video: dict) -> str:
     """Detect content category for videos without a class.
     Series detection runs first with higher priority.
     """
-    title = (video.get("title") or "").lower()
-    description = (video.get("description") or "").lower()
-    text = f"{title} {description}"
+    record = VideoRecord.of(video)
+    return DEFAULT_CLASSIFIER.content_category(
+        DEFAULT_CLASSIFIER.scan(record.title_tokens, record.description_tokens)
+    )
+
+
+# ─── Classifier Engine ────────────────────────────────────────────────────────
 
-    # Phase 1: Try to match a specific series (highest priority)
-    for category, patterns in SERIES_PATTERNS.items():
-        for pattern in patterns:
-            if pattern in title:
+# Letters and digits; hyphens, underscores, "#" and punctuation only separate tokens
+_TOKEN = re.compile(r"[^\W_]+")
+_COMBINING = re.compile(r"[\u0300-\u036f]+")
+
+
+def fold_accents(text: str) -> str:
+    """Strip diacritics: "Poção" → "Pocao"."""
+    if text.isascii():
+        return text
+    return _COMBINING.sub("", unicodedata.normalize("NFKD", text))
+
+
+def tokenize(text: str) -> tuple[str, ...]:
+    """Lowercased, accent-folded tokens: "Mestre-Ferreiro" → ("mestre", "ferreiro")."""
+    return tuple(_TOKEN.findall(fold_accents(text.lower())))
+
+
+class VideoRecord:
+    """The METADATA_FIELDS of one video, built once from the yt-dlp dict so the
+    raw dict can be dropped. Reads like the dict it replaces (`get`, `[]`, `in`);
+    fields yt-dlp did not return stay absent.
+
+    Normalized views (lowercased title/description, tag set, accent-folded
+    text and its tokens) are computed on first use and kept, so every
+    classifier pass over the same video shares them.
+    """
+
+    __slots__ = METADATA_FIELDS + (
+        "_title_lower", "_description_lower", "_tag_set", "_title_folded", "_description_folded",
+        "_title_tokens", "_description_tokens",
+    )
+
+    def __init__(self, **fields):
+        for key in METADATA_FIELDS:
+            if key in fields:
+                setattr(self, key, fields[key])
+
+    @classmethod
+    def of(cls, video) -> "VideoRecord":
+        """`video` itself if already a record, else a record of its fields."""
+        if isinstance(video, cls):
+            return video
+        return cls(**{key: video[key] for key in METADATA_FIELDS if key in video})
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in METADATA_FIELDS else default
+
+    def __getitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in METADATA_FIELDS and hasattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"VideoRecord(id={self.get('id')!r}, title={self.get('title')!r})"
+
+    def _view(self, slot: str, compute):
+        try:
+            return getattr(self, slot)
+        except AttributeError:
+            value = compute()
+            setattr(self, slot, value)
+            return value
+
+    @property
+    def title_lower(self) -> str:
+        return self._view("_title_lower", lambda: (self.get("title") or "").lower())
+
+    @property
+    def description_lower(self) -> str:
+        return self._view("_description_lower", lambda: (self.get("description") or "").lower())
+
+    @property
+    def tag_set(self) -> frozenset[str]:
+        """Lowercased tags, each also without a leading "#"."""
+        return self._view("_tag_set", lambda: frozenset(
+            form for tag in self.get("tags") or []
+            for form in (tag.lower(), tag.lower().lstrip("#"))
+        ))
+
+    @property
+    def title_folded(self) -> str:
+        return self._view("_title_folded", lambda: fold_accents(self.title_lower))
+
+    @property
+    def description_folded(self) -> str:
+        return self._view("_description_folded", lambda: fold_accents(self.description_lower))
+
+    @property
+    def title_tokens(self) -> tuple[str, ...]:
+        return self._view("_title_tokens", lambda: tuple(_TOKEN.findall(self.title_folded)))
+
+    @property
+    def description_tokens(self) -> tuple[str, ...]:
+        return self._view(
+            "_description_tokens", lambda: tuple(_TOKEN.findall(self.description_folded))
+        )
+
+
+def pattern_key(pattern: str) -> str:
+    """Normalized form a table pattern is indexed and reported under."""
+    return " ".join(tokenize(pattern))
+
+
+def _trie_regex(keys: Iterable[str]) -> str:
+    """One alternation over `keys`, nested by shared prefixes ("guia(?:s|)")
+    so each position costs one branch per character instead of one per key.
+    Longer continuations come first: a match is the longest key that fits.
+    """
+    trie: dict = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        branches = [re.escape(char) + render(child) for char, child in node.items() if char]
+        if "" in node:
+            branches.append("")
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    return render(trie)
+
+
+class ScanHits(NamedTuple):
+    """Pattern keys found in one video. Values are 3 (in title) or 1 (elsewhere).
+    `words` has whole-word matches of the short class aliases; `plain` has
+    every match, including ones whose last token continues ("guia" in "guias").
+    """
+    plain: dict[str, int]
+    words: dict[str, int]
+
+
+class Classification(NamedTuple):
+    is_ragnatales: bool
+    class_name: str | None
+    subcategory: str | None
+    content_category: str
+
+
+class Classifier:
+    """Matcher compiled once from the keyword, alias and category tables.
+
+    Patterns are tokenized like the video text (case, accents and hyphens
+    folded), so spelling variants such as "mestre-ferreiro"/"mestre ferreiro"
+    or "progressão"/"progressao" share one index entry. One pass over the
+    title and description tokens finds every pattern of every table, and all
+    decisions are scored from those hits with the original weights.
+
+    With a `decisions` cache, a video whose text was already classified under
+    the same tables (same `fingerprint`) reuses that decision.
+    """
+
+    def __init__(
+        self,
+        keywords=RAGNATALES_KEYWORDS,
+        tags=RAGNATALES_TAGS,
+        class_aliases=CLASS_ALIASES,
+        subcategory_map=SUBCATEGORY_MAP,
+        series_patterns=SERIES_PATTERNS,
+        category_patterns=CATEGORY_PATTERNS,
+        generic_patterns=GENERIC_PATTERNS,
+        pattern_weights=CATEGORY_PATTERN_WEIGHTS,
+        decisions: "DecisionCache | None" = None,
+    ):
+        self.decisions = decisions
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [CLASSIFIER_REVISION, SHORT_ALIAS_MAX_LEN, list(keywords), sorted(tags),
+             class_aliases, subcategory_map, series_patterns, category_patterns,
+             list(generic_patterns), pattern_weights],
+            ensure_ascii=False,
+        ).encode("utf-8")).hexdigest()[:16]
+
+        def keys(patterns) -> list[str]:
+            return list(dict.fromkeys(filter(None, map(pattern_key, patterns))))
+
+        self.keywords = keys(keywords)
+        self.tags = set(tags)
+        self.subcategory_map = dict(subcategory_map)
+        self.series_patterns = {k: keys(v) for k, v in series_patterns.items()}
+        self.generic_patterns = keys(generic_patterns)
+        self.class_order = list(class_aliases)
+        self.category_order = list(category_patterns)
+        self.pattern_weights = {pattern_key(k): w for k, w in pattern_weights.items()}
+
+        # pattern key → [(owner, needs_whole_word)], once per owner
+        self.class_owners: dict[str, list[tuple[str, bool]]] = {}
+        for class_name, aliases in class_aliases.items():
+            for alias in aliases:
+                owner = (class_name, len(alias) <= SHORT_ALIAS_MAX_LEN)
+                owners = self.class_owners.setdefault(pattern_key(alias), [])
+                if owner not in owners:
+                    owners.append(owner)
+        self.category_owners: dict[str, list[str]] = {}
+        for category, patterns in category_patterns.items():
+            for key in keys(patterns):
+                self.category_owners.setdefault(key, []).append(category)
+        self.word_patterns = {
+            key for key, owners in self.class_owners.items()
+            if any(bounded for _, bounded in owners)
+        }
+
+        all_patterns = set(self.keywords) | set(self.generic_patterns) \
+            | set(self.class_owners) | set(self.category_owners)
+        for patterns in self.series_patterns.values():
+            all_patterns.update(patterns)
+        all_patterns.discard("")
+        # Tokens are joined by single spaces, so a key matches at a token start
+        # iff its text follows, and its last token may run on ("guia" in
+        # "guias"). Every key that is a prefix of the longest match also
+        # matched there; it is a whole word if a space follows it in the text.
+        self.matcher = re.compile(f" (?=({_trie_regex(sorted(all_patterns))})( ?))")
+        self.within: dict[str, tuple[str, ...]] = {}
+        self.words_within: dict[str, tuple[str, ...]] = {}
+        for key in all_patterns:
+            shorter = [p for p in all_patterns if key.startswith(p)]
+            self.within[key] = tuple(shorter)
+            self.words_within[key] = tuple(
+                p for p in shorter
+                if p in self.word_patterns and p != key and key[len(p)] == " "
+            )
+
+    def scan(self, title_tokens: tuple[str, ...], description_tokens: tuple[str, ...]) -> ScanHits:
+        """Find every table pattern in tokenized title/description (see tokenize).
+        A pattern's last token may also match the start of a longer word.
+        """
+        plain: dict[str, int] = {}
+        words: dict[str, int] = {}
+        for weight, tokens in ((3, title_tokens), (1, description_tokens)):
+            for longest, space in set(self.matcher.findall(f" {' '.join(tokens)} ")):
+                for pattern in self.within[longest]:
+                    if plain.get(pattern, 0) < weight:
+                        plain[pattern] = weight
+                found = self.words_within[longest]
+                if space and longest in self.word_patterns:
+                    found += (longest,)
+                for pattern in found:
+                    if words.get(pattern, 0) < weight:
+                        words[pattern] = weight
+        return ScanHits(plain, words)
+
+    def is_ragnatales(self, hits: ScanHits, tag_set: frozenset[str]) -> bool:
+        """`tag_set` as in VideoRecord.tag_set."""
+        if any(kw in hits.plain for kw in self.keywords):
+            return True
+        return not self.tags.isdisjoint(tag_set)
+
+    def class_hits(self, hits: ScanHits) -> dict[str, list[tuple[str, int]]]:
+        """Class → the (pattern, weight) hits its score is the sum of."""
+        found: dict[str, list[tuple[str, int]]] = {}
+        for pattern, weight in hits.plain.items():
+            for class_name, bounded in self.class_owners.get(pattern, ()):
+                if not bounded:
+                    found.setdefault(class_name, []).append((pattern, weight))
+        for pattern, weight in hits.words.items():
+            for class_name, bounded in self.class_owners[pattern]:
+                if bounded:
+                    found.setdefault(class_name, []).append((pattern, weight))
+        return found
+
+    def category_hits(self, hits: ScanHits) -> dict[str, list[tuple[str, int]]]:
+        """Content category → the (pattern, weight) hits its score is the sum of."""
+        found: dict[str, list[tuple[str, int]]] = {}
+        for pattern, weight in hits.plain.items():
+            weight *= self.pattern_weights.get(pattern, 1)
+            for category in self.category_owners.get(pattern, ()):
+                found.setdefault(category, []).append((pattern, weight))
+        return found
+
+    def class_of(self, hits: ScanHits) -> tuple[str | None, str | None]:
+        if any(hits.plain.get(p) == 3 for p in self.generic_patterns):
+            return None, None
+
+        scores = {c: sum(w for _, w in found) for c, found in self.class_hits(hits).items()}
+        if not scores:
+            return None, None
+
+        # Ties go to the class listed first, as in CLASS_ALIASES
+        best_class = max((c for c in self.class_order if c in scores), key=scores.get)
+        return best_class, self.subcategory_map.get(best_class, "Outros")
+
+    def content_category(self, hits: ScanHits) -> str:
+        # Phase 1: Try to match a specific series (highest priority)
+        for category, patterns in self.series_patterns.items():
+            if any(hits.plain.get(p) == 3 for p in patterns):
                 return category
 
-    # Phase 2: General category matching with scoring
-    scores: dict[str, int] = {}
-    for category, patterns in CATEGORY_PATTERNS.items():
-        score = 0
-        for pattern in patterns:
-            if pattern in title:
-                score += 3
-            elif pattern in text:
-                score += 1
-        if score > 0:
-            scores[category] = score
+        # Phase 2: General category matching with scoring
+        scores = {c: sum(w for _, w in found) for c, found in self.category_hits(hits).items()}
+        if not scores:
+            return "Outros"
+
+        return max((c for c in self.category_order if c in scores), key=scores.get)
+
+    def classify(self, video: dict | VideoRecord) -> Classification:
+        """Make all three decisions for a video from a single scan."""
+        record = VideoRecord.of(video)
+        if TRACE is None:
+            return self._classify(record)
+        vid_id = record.get("id") or ""
+        TRACE.text_size(vid_id, len(record.get("title") or "") + len(record.get("description") or ""))
+        with TRACE.timed(vid_id, "classifySeconds"):
+            return self._classify(record)
+
+    def _classify(self, record: VideoRecord) -> Classification:
+        if self.decisions is not None:
+            decision = self.decisions.lookup(record, self.fingerprint)
+            if decision is not None:
+                return decision
+        hits = self.scan(record.title_tokens, record.description_tokens)
+        class_name, subcategory = self.class_of(hits)
+        decision = Classification(
+            is_ragnatales=self.is_ragnatales(hits, record.tag_set),
+            class_name=class_name,
+            subcategory=subcategory,
+            content_category="Builds" if class_name else self.content_category(hits),
+        )
+        if self.decisions is not None:
+            self.decisions.store(record, self.fingerprint, decision)
+        return decision
+
+    def explain(self, video: dict | VideoRecord) -> dict:
+        """The hits behind a video's decision, always recomputed: matched
+        keywords and tags, generic and series patterns in the title, and the
+        (pattern, weight) pairs summed into each class and category score.
+        """
+        record = VideoRecord.of(video)
+        hits = self.scan(record.title_tokens, record.description_tokens)
+        class_name, subcategory = self.class_of(hits)
+        return {
+            "decision": Classification(
+                is_ragnatales=self.is_ragnatales(hits, record.tag_set),
+                class_name=class_name,
+                subcategory=subcategory,
+                content_category="Builds" if class_name else self.content_category(hits),
+            ),
+            "keywords": [k for k in self.keywords if k in hits.plain],
+            "tags": sorted(self.tags & record.tag_set),
+            "generic": [p for p in self.generic_patterns if hits.plain.get(p) == 3],
+            "series": {
+                category: found for category, patterns in self.series_patterns.items()
+                if (found := [p for p in patterns if hits.plain.get(p) == 3])
+            },
+            "classes": self.class_hits(hits),
+            "categories": self.category_hits(hits),
+        }
+
+    def __getstate__(self) -> dict:
+        # Process-pool workers get the tables, not the parent's decision cache
+        return {**self.__dict__, "decisions": None}
+
+
+DEFAULT_CLASSIFIER = Classifier()
+
+
+# ─── Output Files ─────────────────────────────────────────────────────────────
 
-    if not scores:
-        return "Outros"
+def _render_temp(path: Path, render, buffering: int = -1, binary: bool = False) -> str:
+    """Render into a new temp file next to `path` and return its name.
+    The file is opened in binary mode if `binary`, else as UTF-8 text.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp creates 0600 files; outputs are read by the site build
+        os.chmod(tmp, 0o644)
+        if binary:
+            f = open(fd, "wb", buffering=buffering)
+        else:
+            f = open(fd, "w", encoding="utf-8", buffering=buffering)
+        with f:
+            render(f)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp
+
+
+def atomic_write(path: Path, render, buffering: int = -1, binary: bool = False):
+    """Write `path` via `render(f)` into a temp file, then rename it into place.
+    A crash mid-write leaves the previous file intact instead of a truncated one.
+    """
+    os.replace(_render_temp(path, render, buffering, binary), path)
+
+
+def _content_hash(path: Path, volatile_prefixes: tuple[str, ...] = ()) -> str:
+    digest = hashlib.sha256()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.startswith(volatile_prefixes):
+                digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_if_changed(
+    path: Path,
+    render,
+    volatile_prefixes: tuple[str, ...] = (),
+    buffering: int = -1,
+    hashes_path: Path | None = None,
+) -> bool:
+    """Render into a temp file and atomically replace `path` only if the content
+    differs from what is there. Returns whether `path` was rewritten.
+    The stored hash is trusted while the file's size and mtime still match it;
+    otherwise the existing file is hashed again.
+    """
+    hashes = JsonCache(hashes_path or OUTPUT_HASHES)
+    key = path.name
+    tmp = _render_temp(path, render, buffering)
+    try:
+        new_hash = _content_hash(Path(tmp), volatile_prefixes)
+
+        old_hash = None
+        if path.exists():
+            stat = path.stat()
+            stored = hashes.get(key) or {}
+            if stored.get("size") == stat.st_size and stored.get("mtimeNs") == stat.st_mtime_ns:
+                old_hash = stored.get("sha256")
+            else:
+                old_hash = _content_hash(path, volatile_prefixes)
+
+        if new_hash == old_hash:
+            os.unlink(tmp)
+            changed = False
+        else:
+            os.replace(tmp, path)
+            changed = True
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+    stat = path.stat()
+    hashes.put(key, sha256=new_hash, size=stat.st_size, mtimeNs=stat.st_mtime_ns)
+    hashes.save()
+    METRICS.count("outputs_changed" if changed else "outputs_unchanged")
+    return changed
+
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+
+class RunMetrics:
+    """Stage timers and event counters for one run, safe to update from threads.
+
+    Stages overlap when the listing is streamed, so each timer is the time spent
+    inside that stage (summed over concurrent workers), not a slice of the total.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        if TRACE is not None:
+            TRACE.enter(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+            if TRACE is not None:
+                TRACE.leave(name)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "startedAt": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "totalSeconds": round(time.time() - self.started, 3),
+                "stages": {name: round(sec, 3) for name, sec in self.stages.items()},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def save(self, path: Path = METRICS_JSON):
+        summary = self.summary()
+        atomic_write(path, lambda f: json.dump(summary, f, indent=2))
+
+
+METRICS = RunMetrics()
+
+
+class RunTrace:
+    """Per-video costs, memory peaks and sampled call stacks of a --trace run.
+
+    Callers add each video's yt-dlp, HEAD and classification time and its text
+    size, and apart from those the rate-limit wait before its calls, which is
+    left out of the video's total. A sampler thread wakes every TRACE_SAMPLE_SECONDS to collapse every
+    other thread's Python stack into a count, and to attribute the memory
+    tracemalloc sees to the stages running at that moment. tracemalloc slows
+    the run down, so compare videos and stages with each other rather than
+    with untraced timings.
+    """
+
+    def __init__(self):
+        self.videos: dict[str, dict[str, float]] = {}
+        self.stacks: dict[str, int] = {}
+        self.stage_peaks: dict[str, int] = {}
+        self.allocations: list[dict] = []
+        self.peak = 0
+        self._active: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="trace-sampler", daemon=True)
+
+    def start(self):
+        tracemalloc.start()
+        self._sampler.start()
+
+    def stop(self):
+        """Stop sampling and keep the overall peak and the top allocation sites."""
+        if not self._sampler.is_alive():
+            return
+        self._stop.set()
+        self._sampler.join()
+        _, self.peak = tracemalloc.get_traced_memory()
+        self.allocations = [
+            {"site": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+            for stat in tracemalloc.take_snapshot().statistics("lineno")[:10]
+        ]
+        tracemalloc.stop()
+
+    def add(self, vid_id: str, field: str, seconds: float):
+        with self._lock:
+            video = self.videos.setdefault(vid_id, {})
+            video[field] = video.get(field, 0.0) + seconds
+
+    @contextmanager
+    def timed(self, vid_id: str, field: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(vid_id, field, time.perf_counter() - start)
+
+    def text_size(self, vid_id: str, size: int):
+        with self._lock:
+            video = self.videos.setdefault(vid_id, {})
+            video["textChars"] = max(video.get("textChars", 0), size)
+
+    def enter(self, stage: str):
+        with self._lock:
+            self._active[stage] = self._active.get(stage, 0) + 1
+
+    def leave(self, stage: str):
+        with self._lock:
+            self._active[stage] -= 1
+            if not self._active[stage]:
+                del self._active[stage]
+
+    def _sample(self):
+        me = threading.get_ident()
+        while not self._stop.wait(TRACE_SAMPLE_SECONDS):
+            current, _ = tracemalloc.get_traced_memory()
+            frames = sys._current_frames()
+            with self._lock:
+                for stage in self._active:
+                    self.stage_peaks[stage] = max(self.stage_peaks.get(stage, 0), current)
+                for ident, frame in frames.items():
+                    if ident == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    key = ";".join(reversed(stack))
+                    self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def slowest(self, top: int = TRACE_TOP) -> list[dict]:
+        """The `top` videos by yt-dlp + HEAD + classification time."""
+        with self._lock:
+            rows = [
+                {"id": vid_id,
+                 "totalSeconds": sum(v for k, v in costs.items()
+                                     if k.endswith("Seconds") and k != "rateWaitSeconds"),
+                 **costs}
+                for vid_id, costs in self.videos.items()
+            ]
+        rows.sort(key=lambda row: row["totalSeconds"], reverse=True)
+        return [{k: round(v, 4) if isinstance(v, float) else v for k, v in row.items()}
+                for row in rows[:top]]
+
+    def save(self, path: Path = TRACE_JSON, stacks_path: Path = TRACE_STACKS, top: int = TRACE_TOP):
+        self.stop()
+        report = {
+            "peakMemoryBytes": self.peak,
+            "stagePeakBytes": dict(sorted(self.stage_peaks.items())),
+            "topAllocations": self.allocations,
+            "slowest": self.slowest(top),
+            "videos": {vid_id: {k: round(v, 4) for k, v in costs.items()}
+                       for vid_id, costs in sorted(self.videos.items())},
+        }
+        atomic_write(path, lambda f: json.dump(report, f, ensure_ascii=False, indent=2))
+        atomic_write(stacks_path, lambda f: f.writelines(
+            f"{stack} {count}\n" for stack, count in sorted(self.stacks.items())
+        ))
+
+        print(f"\nTrace salvo em: {path} (pilhas em {stacks_path})")
+        print(f"  Pico de memória: {self.peak / 1e6:.1f} MB")
+        for stage, peak in sorted(self.stage_peaks.items(), key=lambda item: -item[1]):
+            print(f"    - {stage}: {peak / 1e6:.1f} MB")
+        print(f"  {len(report['slowest'])} vídeos mais lentos:")
+        for row in report["slowest"]:
+            print(f"    - {row['id']}: {row['totalSeconds']:.3f}s "
+                  f"(yt-dlp {row.get('ytdlpSeconds', 0):.3f}s, HEAD {row.get('headSeconds', 0):.3f}s, "
+                  f"classificação {row.get('classifySeconds', 0) * 1000:.2f}ms, "
+                  f"{row.get('textChars', 0)} caracteres; "
+                  f"espera de rate limit {row.get('rateWaitSeconds', 0):.3f}s)")
+
+
+TRACE: RunTrace | None = None
+
+
+def start_trace():
+    """Trace the rest of the process (see RunTrace)."""
+    global TRACE
+    TRACE = RunTrace()
+    TRACE.start()
 
-    return max(scores, key=scores.get)
+
+# ─── Checkpoints ──────────────────────────────────────────────────────────────
+
+class RunJournal:
+    """Append-only JSONL of finished work, one `{"stage", "id", "data"}` line
+    per video as soon as its result is known, so an interrupted run can be
+    resumed instead of restarted.
+
+    Without `resume` a previous journal is discarded. With it, the journal is
+    loaded (a torn last line is ignored), compacted to the latest line per
+    stage and ID, and appended to. `finish()` removes it after a successful
+    run, once every result is in the caches and the store.
+    """
+
+    LISTING_DONE = "listing-done"
+
+    def __init__(self, path: Path = JOURNAL, resume: bool = False):
+        self.path = path
+        self.entries: dict[str, dict[str, object]] = {}
+        if resume and path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries.setdefault(item["stage"], {})[item["id"]] = item.get("data")
+            self.compact()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def get(self, stage: str, key: str):
+        return self.entries.get(stage, {}).get(key)
+
+    def stage(self, stage: str) -> dict[str, object]:
+        """Everything recorded for `stage`, in recording order."""
+        return self.entries.get(stage, {})
+
+    def record(self, stage: str, key: str, data=None):
+        line = json.dumps({"stage": stage, "id": key, "data": data}, ensure_ascii=False)
+        with self._lock:
+            self.entries.setdefault(stage, {})[key] = data
+            self._file.write(line + "\n")
+
+    def compact(self):
+        """Rewrite the journal with only the latest line per stage and ID."""
+        def render(f):
+            for stage, items in self.entries.items():
+                for key, data in items.items():
+                    f.write(json.dumps({"stage": stage, "id": key, "data": data}, ensure_ascii=False) + "\n")
+        atomic_write(self.path, render)
+
+    def close(self):
+        self._file.close()
+
+    def finish(self):
+        """The run succeeded: its results live elsewhere, drop the journal."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+# ─── Rate Limiting ────────────────────────────────────────────────────────────
+
+# Set while a worker pool unwinds after an error or Ctrl-C (see _worker_pool):
+# calls already running stop waiting for tokens and start no new yt-dlp
+# process or retry
+_STOPPING = threading.Event()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` saved."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float = 1) -> float:
+        """Take `cost` tokens (capped at the burst size), sleeping until they
+        are available. Returns the seconds spent waiting. Once _STOPPING is
+        set it returns without tokens: the run is being torn down.
+        """
+        cost = min(cost, self.burst)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= cost:
+                    self.tokens -= cost
+                    return waited
+                delay = max(self.paused_until - now, (cost - self.tokens) / self.rate)
+            if _STOPPING.wait(delay):
+                return waited
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for `seconds` (e.g. a server's Retry-After)."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class HostLimiter:
+    """Rate limit plus adaptive concurrency limit for one host.
+
+    Concurrency follows AIMD: a throttling response halves the number of calls
+    allowed in flight, and every window of healthy calls as large as the
+    current limit raises it by one, up to `concurrency` (or back to unlimited).
+    Waits, throttling and limit changes are counted in METRICS per host.
+    """
+
+    def __init__(self, host: str, rate: float = 0.0, burst: float = 1,
+                 concurrency: int | None = None):
+        self.host = host
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.ceiling = concurrency
+        self.limit = concurrency
+        self.in_flight = 0
+        self.peak = 0
+        self._healthy = 0
+        self._cooldown_until = 0.0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def request(self, cost: float = 1):
+        """Hold a concurrency slot and `cost` tokens for one outbound call.
+        Yields the seconds spent waiting for them.
+        """
+        start = time.perf_counter()
+        with self._cond:
+            while self.limit is not None and self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.bucket:
+                self.bucket.acquire(cost)
+            waited = time.perf_counter() - start
+            METRICS.record(f"rate_wait[{self.host}]", waited)
+            yield waited
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def throttled(self, retry_after: float = 0.0):
+        """Back off after a 429, a timeout or a yt-dlp throttling error."""
+        METRICS.count(f"throttled[{self.host}]")
+        if self.bucket and retry_after > 0:
+            self.bucket.pause(retry_after)
+        with self._cond:
+            now = time.monotonic()
+            if now < self._cooldown_until:
+                return
+            self._cooldown_until = now + THROTTLE_COOLDOWN_SECONDS
+            self._healthy = 0
+            current = self.limit if self.limit is not None else self.peak
+            self.limit = max(1, current // 2)
+        METRICS.count(f"concurrency_down[{self.host}]")
+
+    def succeeded(self):
+        """Count a healthy call; after a full window, allow one more in flight."""
+        with self._cond:
+            if self.limit is None or self.limit == self.ceiling:
+                return
+            self._healthy += 1
+            if self._healthy < self.limit:
+                return
+            self._healthy = 0
+            self.limit += 1
+            if self.ceiling is None and self.limit > self.peak:
+                self.limit = None
+            self._cond.notify_all()
+        METRICS.count(f"concurrency_up[{self.host}]")
+
+
+_LIMITERS: dict[str, HostLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def configure_rate_limits(overrides: dict[str, dict] | None = None):
+    """Reset the per-host limiters to HOST_LIMITS updated with `overrides`."""
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
+        for host, limits in {**HOST_LIMITS, **(overrides or {})}.items():
+            _LIMITERS[host] = HostLimiter(host, **limits)
+
+
+def limiter_for(url: str) -> HostLimiter:
+    """The shared limiter for `url`'s host (unlimited for unlisted hosts)."""
+    host = urllib.parse.urlsplit(url).hostname or ""
+    with _LIMITERS_LOCK:
+        if not _LIMITERS:
+            for name, limits in HOST_LIMITS.items():
+                _LIMITERS[name] = HostLimiter(name, **limits)
+        if host not in _LIMITERS:
+            _LIMITERS[host] = HostLimiter(host)
+        return _LIMITERS[host]
+
+
+def check_throttling(limiter: HostLimiter, resp: requests.Response):
+    """Report an HTTP response to its host's limiter. A throttling status backs
+    the limiter off, for the Retry-After seconds if given, and raises HTTPError;
+    any other response counts as a healthy call.
+    """
+    if resp.status_code in THROTTLE_STATUS:
+        retry_after = resp.headers.get("retry-after", "")
+        limiter.throttled(float(retry_after) if retry_after.isdigit() else 0.0)
+        raise requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+    limiter.succeeded()
+
+
+def parse_rate_limits(spec: str) -> dict[str, dict]:
+    """Parse `host=rate[:burst[:concurrency]],...` into HOST_LIMITS entries."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, values = item.partition("=")
+        rate, burst, concurrency = (values.split(":") + [None, None])[:3]
+        limits[host] = {
+            "rate": float(rate),
+            "burst": float(burst) if burst else max(1.0, float(rate)),
+            "concurrency": int(concurrency) if concurrency else None,
+        }
+    return limits
+
+
+def share_rate_limits(overrides: dict[str, dict], shares: int) -> dict[str, dict]:
+    """HOST_LIMITS updated with `overrides`, each rate and burst split into
+    `shares` equal parts: limiters are per process, so N job processes with
+    the full budget each would send N times the configured rate.
+    """
+    limits = {}
+    for host, host_limits in {**HOST_LIMITS, **overrides}.items():
+        limits[host] = dict(host_limits)
+        for key in ("rate", "burst"):
+            if key in limits[host]:
+                limits[host][key] = limits[host][key] / shares
+    return limits
+
+
+def is_throttled(stderr: str) -> bool:
+    """Whether yt-dlp's error output says YouTube is throttling the run."""
+    return any(marker in stderr for marker in THROTTLE_MARKERS)
+
+
+# ─── Fixtures ─────────────────────────────────────────────────────────────────
+
+class FixtureResponse:
+    """Recorded HEAD response, standing in for requests.Response in replay."""
+
+    def __init__(self, status_code: int, headers: dict):
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+
+
+class Fixtures:
+    """Record/replay of everything the pipeline fetches, under `path`:
+
+        ytdlp/listing-<hash>.jsonl  channel listing lines, then its exit code
+        ytdlp/videos/<id>.json      one video's yt-dlp JSON
+        http/<hash>.json            one thumbnail HEAD response
+
+    Recording tees real yt-dlp output and responses into these files. Replay
+    serves them instead, with no subprocess, network or rate-limit wait.
+    Videos are stored one per file, so replay does not depend on how the IDs
+    were batched when recording.
+    """
+
+    def __init__(self, path: Path, mode: str):
+        self.path = path
+        self.replaying = mode == "replay"
+        self._lock = threading.Lock()
+        if not self.replaying:
+            (path / "ytdlp" / "videos").mkdir(parents=True, exist_ok=True)
+            (path / "http").mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _key(value) -> str:
+        return hashlib.sha1(json.dumps(value).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _video_ids(cmd: list[str]) -> list[str]:
+        return [
+            urllib.parse.parse_qs(urllib.parse.urlsplit(arg).query)["v"][0]
+            for arg in cmd if arg.startswith("http") and "v=" in arg
+        ]
+
+    def _listing_path(self, cmd: list[str]) -> Path:
+        return self.path / "ytdlp" / f"listing-{self._key(cmd)}.jsonl"
+
+    def _video_path(self, vid_id: str) -> Path:
+        return self.path / "ytdlp" / "videos" / f"{vid_id}.json"
+
+    def _http_path(self, url: str) -> Path:
+        return self.path / "http" / f"{self._key(url)}.json"
+
+    # yt-dlp
+
+    def replay_ytdlp(self, cmd: list[str]) -> Iterator[dict]:
+        """Yield what `cmd` printed when recorded; returns its exit code."""
+        METRICS.count("fixture_replays")
+        vid_ids = self._video_ids(cmd)
+        if not vid_ids:
+            path = self._listing_path(cmd)
+            if not path.exists():
+                print(f"Erro yt-dlp: sem fixture para {' '.join(cmd)}")
+                return 1
+            returncode = 0
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    data = json.loads(line)
+                    if "_returncode" in data:
+                        returncode = data["_returncode"]
+                    else:
+                        yield data
+            return returncode
+        missing = 0
+        for vid_id in vid_ids:
+            data = self.replay_video(vid_id)
+            if data is None:
+                missing += 1
+            else:
+                yield data
+        return 1 if missing else 0
+
+    def replay_video(self, vid_id: str) -> dict | None:
+        path = self._video_path(vid_id)
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def start_ytdlp(self, cmd: list[str]):
+        if not self._video_ids(cmd):
+            self._listing_path(cmd).unlink(missing_ok=True)
+
+    def record_ytdlp(self, cmd: list[str], data: dict):
+        """Store one JSON line `cmd` printed (or its exit code, as `_returncode`)."""
+        if self._video_ids(cmd) and "_returncode" not in data:
+            atomic_write(self._video_path(data["id"]),
+                         lambda f: json.dump(data, f, ensure_ascii=False))
+        elif not self._video_ids(cmd):
+            with self._lock, open(self._listing_path(cmd), "a", encoding="utf-8") as f:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+    # HTTP
+
+    def replay_head(self, url: str, headers: dict) -> FixtureResponse:
+        """The recorded response for `url`, or 304 when a conditional request's
+        validators still match it.
+        """
+        METRICS.count("fixture_replays")
+        path = self._http_path(url)
+        if not path.exists():
+            raise requests.ConnectionError(f"sem fixture para {url}")
+        with open(path, encoding="utf-8") as f:
+            recorded = json.load(f)
+        response = FixtureResponse(recorded["status"], recorded["headers"])
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if response.status_code == 200 and (
+            (etag and headers.get("If-None-Match") == etag)
+            or (last_modified and headers.get("If-Modified-Since") == last_modified)
+        ):
+            return FixtureResponse(304, {})
+        return response
+
+    def record_head(self, url: str, response):
+        # A 304 only says "same as before": keep the full response already recorded
+        if response.status_code == 304 and self._http_path(url).exists():
+            return
+        recorded = {"url": url, "status": response.status_code, "headers": dict(response.headers)}
+        atomic_write(self._http_path(url), lambda f: json.dump(recorded, f, indent=1))
+
+
+FIXTURES: Fixtures | None = None
+
+
+def use_fixtures(path: Path | None, mode: str = "replay"):
+    """Record to, or replay from, `path` for the rest of the process (None: off)."""
+    global FIXTURES
+    FIXTURES = Fixtures(path, mode) if path else None
 
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
-def fetch_channel_videos() -> list[dict]:
-    """Use yt-dlp to fetch all video metadata from the channel."""
-    print(f"[1/4] Buscando vídeos do canal {CHANNEL_URL} ...")
+def _stream_json_lines(
+    cmd: list[str],
+    limiter: HostLimiter | None = None,
+    cost: float = 1,
+    started: Callable[[float], None] | None = None,
+) -> Iterator[dict]:
+    """Run `cmd` and yield each JSON line of its stdout as soon as it is printed.
+    The generator's return value is the process exit code. With a `limiter`,
+    the process holds one of its slots and `cost` tokens, and its outcome is
+    reported back to it. `started`, if given, is called with the seconds
+    spent waiting for the limiter once the process is running. Fixtures, when
+    in use, are recorded or replayed here. While _STOPPING is set nothing is
+    started and the return value is -1.
+    """
+    if FIXTURES and FIXTURES.replaying:
+        return (yield from FIXTURES.replay_ytdlp(cmd))
+    if FIXTURES:
+        FIXTURES.start_ytdlp(cmd)
+    with limiter.request(cost) if limiter else contextlib.nullcontext(0.0) as waited, \
+            tempfile.TemporaryFile(mode="w+", encoding="utf-8") as stderr:
+        if _STOPPING.is_set():
+            return -1
+        METRICS.count("subprocess_calls")
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=stderr, text=True, encoding="utf-8"
+        )
+        if started:
+            started(waited)
+        try:
+            for line in proc.stdout:
+                if line.strip():
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if FIXTURES:
+                        FIXTURES.record_ytdlp(cmd, data)
+                    yield data
+            returncode = proc.wait()
+            if FIXTURES:
+                FIXTURES.record_ytdlp(cmd, {"_returncode": returncode})
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+        if returncode != 0:
+            METRICS.count("ytdlp_errors")
+            stderr.seek(0)
+            errors = stderr.read()
+            print(f"Erro yt-dlp: {errors[:500]}")
+            if limiter and is_throttled(errors):
+                limiter.throttled()
+        elif limiter:
+            limiter.succeeded()
+        return returncode
+
+
+def stream_channel_videos(
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    only_ragnatales: bool = True,
+    channel_url: str | None = None,
+    journal: RunJournal | None = None,
+) -> Iterator[VideoRecord]:
+    """Yield the channel's videos while yt-dlp is still listing them.
+    Entries are turned into VideoRecords as they arrive and, by default, only
+    RagnaTales videos are yielded, so memory stays flat however large the dump is.
+    If yt-dlp fails, the full fallback lists the rest; if that fails too the
+    run exits with an error before anything is exported.
+
+    Yielded entries are checkpointed in `journal`. A listing the journal saw
+    complete is replayed from it; an incomplete one is listed again, since it
+    cannot tell which videos are missing.
+    """
+    channel_url = channel_url or CHANNEL_URL
+    if journal and journal.get(RunJournal.LISTING_DONE, channel_url):
+        print(f"[1/4] Retomando listagem do canal {channel_url} do journal ...")
+        for data in journal.stage("listing").values():
+            yield VideoRecord.of(data)
+        METRICS.count("journal_resumed_listing", len(journal.stage("listing")))
+        return
+    print(f"[1/4] Buscando vídeos do canal {channel_url} ...")
 
     cmd = [
         "yt-dlp",
@@ -238,42 +1486,66 @@ def fetch_channel_videos() -> list[dict]:
         "--dump-json",
         "--no-warnings",
         "--extractor-args", "youtube:lang=pt",
-        f"{CHANNEL_URL}/videos",
+        f"{channel_url}/videos",
+    ]
+    # Fallback: extract full info for each video
+    cmd_full = [
+        "yt-dlp",
+        "--dump-json",
+        "--no-download",
+        "--no-warnings",
+        "--extractor-args", "youtube:lang=pt",
+        f"{channel_url}/videos",
     ]
 
-    result = subprocess.run(
-        cmd, capture_output=True, text=True, encoding="utf-8"
-    )
-
-    if result.returncode != 0:
-        print(f"Erro yt-dlp (flat): {result.stderr[:500]}")
-        print("Tentando busca completa (mais lenta)...")
-        # Fallback: extract full info for each video
-        cmd_full = [
-            "yt-dlp",
-            "--dump-json",
-            "--no-download",
-            "--no-warnings",
-            "--extractor-args", "youtube:lang=pt",
-            f"{CHANNEL_URL}/videos",
-        ]
-        result = subprocess.run(
-            cmd_full, capture_output=True, text=True, encoding="utf-8"
-        )
-        if result.returncode != 0:
-            print(f"Erro fatal yt-dlp: {result.stderr[:500]}")
-            sys.exit(1)
+    listed = kept = 0
+    seen: set[str] = set()
+    with METRICS.stage("listing"):
+        for attempt, command in enumerate((cmd, cmd_full)):
+            if attempt:
+                print("Tentando busca completa (mais lenta)...")
+            stream = _stream_json_lines(command)
+            while True:
+                try:
+                    video = next(stream)
+                except StopIteration as stop:
+                    returncode = stop.value
+                    break
+                # The fallback relists what a failed flat listing already yielded
+                if video.get("id") in seen:
+                    continue
+                seen.add(video.get("id"))
+                listed += 1
+                record = VideoRecord.of(video)
+                if only_ragnatales and not classifier.classify(record).is_ragnatales:
+                    continue
+                kept += 1
+                if journal:
+                    journal.record("listing", record.get("id"), slim_metadata(record))
+                yield record
+            if returncode == 0:
+                break
+        if journal and returncode == 0:
+            journal.record(RunJournal.LISTING_DONE, channel_url, True)
+    METRICS.count("videos_listed", listed)
+
+    if returncode != 0:
+        # What was yielded is only part of the channel: exporting it would
+        # drop every unlisted video from the catalog, so fail the run
+        print("Erro fatal yt-dlp: listagem do canal falhou.")
+        sys.exit(1)
+    if not listed:
+        print("Nenhum vídeo encontrado. Verifique se yt-dlp está instalado.")
+        sys.exit(1)
+    if only_ragnatales:
+        print(f"   Encontrados {listed} vídeos no canal ({kept} de RagnaTales).")
+    else:
+        print(f"   Encontrados {listed} vídeos no canal.")
 
-    videos = []
-    for line in result.stdout.strip().split("\n"):
-        if line.strip():
-            try:
-                videos.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
 
-    print(f"   Encontrados {len(videos)} vídeos no canal.")
-    return videos
+def fetch_channel_videos() -> list[VideoRecord]:
+    """Use yt-dlp to fetch all video metadata from the channel."""
+    return list(stream_channel_videos(only_ragnatales=False))
 
 
 def needs_full_metadata(videos: list[dict]) -> bool:
@@ -285,194 +1557,456 @@ def needs_full_metadata(videos: list[dict]) -> bool:
     return "description" not in sample and "tags" not in sample
 
 
-def fetch_full_metadata(video_ids: list[str]) -> list[dict]:
-    """Fetch full metadata for specific video IDs."""
-    print(f"[1.5/4] Buscando metadados completos de {len(video_ids)} vídeos...")
-
-    full_videos = []
-    for i, vid_id in enumerate(video_ids):
-        url = f"https://www.youtube.com/watch?v={vid_id}"
-        cmd = [
-            "yt-dlp",
-            "--dump-json",
-            "--no-download",
-            "--no-warnings",
-            url,
-        ]
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, encoding="utf-8"
-        )
+@contextmanager
+def _worker_pool(workers: int) -> Iterator[ThreadPoolExecutor]:
+    """ThreadPoolExecutor for a `with` block that waits for its own results.
+    If the block raises (Ctrl-C included), queued calls are cancelled and only
+    the ones already running are waited for, so their results still reach
+    the journal before run_job closes it.
+    """
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        yield pool
+    except BaseException:
+        _STOPPING.set()
+        try:
+            pool.shutdown(wait=True, cancel_futures=True)
+        finally:
+            _STOPPING.clear()
+        raise
+    pool.shutdown(wait=True)
+
+
+def _fetch_one_metadata(vid_id: str, retries: int) -> VideoRecord | None:
+    """Run yt-dlp for a single video, retrying with exponential backoff.
+    Returns the parsed metadata or None if every attempt failed.
+    """
+    url = VIDEO_URL.format(id=vid_id)
+    limiter = limiter_for(url)
+    cmd = [
+        "yt-dlp",
+        "--dump-json",
+        "--no-download",
+        "--no-warnings",
+        url,
+    ]
+    if FIXTURES and FIXTURES.replaying:
+        METRICS.count("fixture_replays")
+        data = FIXTURES.replay_video(vid_id)
+        return VideoRecord.of(data) if data is not None else None
+    for attempt in range(retries + 1):
+        if attempt:
+            METRICS.count("retries")
+        with limiter.request() as waited, \
+                TRACE.timed(vid_id, "ytdlpSeconds") if TRACE else contextlib.nullcontext():
+            if TRACE:
+                TRACE.add(vid_id, "rateWaitSeconds", waited)
+            if _STOPPING.is_set():
+                return None
+            METRICS.count("subprocess_calls")
+            result = subprocess.run(
+                cmd, capture_output=True, text=True, encoding="utf-8"
+            )
+        if result.returncode != 0 and is_throttled(result.stderr):
+            limiter.throttled()
+        elif result.returncode == 0:
+            limiter.succeeded()
         if result.returncode == 0 and result.stdout.strip():
             try:
                 data = json.loads(result.stdout.strip())
-                full_videos.append(data)
             except json.JSONDecodeError:
                 pass
+            else:
+                if FIXTURES:
+                    FIXTURES.record_ytdlp(cmd, data)
+                return VideoRecord.of(data)
+        if attempt < retries:
+            _STOPPING.wait(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+    return None
+
+
+def _fetch_metadata_batch(
+    vid_ids: list[str], retries: int, journal: RunJournal | None = None
+) -> list[VideoRecord | None]:
+    """Fetch many videos with one yt-dlp process.
+    Results are matched back to `vid_ids` by the `id` in each JSON line; IDs
+    the batch did not return are retried one by one. Each result is
+    checkpointed in `journal` as soon as it arrives.
+    """
+    def fetch_one(vid_id: str) -> VideoRecord | None:
+        data = _fetch_one_metadata(vid_id, retries)
+        if journal and data is not None:
+            journal.record("metadata", vid_id, slim_metadata(data))
+        return data
 
-        if (i + 1) % 10 == 0:
-            print(f"   ... {i + 1}/{len(video_ids)} processados")
+    if len(vid_ids) == 1:
+        return [fetch_one(vid_ids[0])]
 
-    return full_videos
+    cmd = [
+        "yt-dlp",
+        "--dump-json",
+        "--no-download",
+        "--no-warnings",
+        "--ignore-errors",
+        *(VIDEO_URL.format(id=vid_id) for vid_id in vid_ids),
+    ]
+    by_id = {}
+    # yt-dlp prints one video at a time: the gap before a line is its cost,
+    # counted from the process start; the limiter wait is shared by the batch
+    last = time.perf_counter()
+
+    def started(waited: float):
+        nonlocal last
+        last = time.perf_counter()
+        if TRACE is not None:
+            for vid_id in vid_ids:
+                TRACE.add(vid_id, "rateWaitSeconds", waited / len(vid_ids))
+
+    for data in _stream_json_lines(cmd, limiter_for(cmd[-1]), len(vid_ids), started):
+        if TRACE is not None:
+            now = time.perf_counter()
+            TRACE.add(data.get("id") or "", "ytdlpSeconds", now - last)
+            last = now
+        if data.get("id") in vid_ids:
+            by_id[data["id"]] = VideoRecord.of(data)
+            if journal:
+                journal.record("metadata", data["id"], slim_metadata(by_id[data["id"]]))
+
+    return [by_id[vid_id] if vid_id in by_id else fetch_one(vid_id) for vid_id in vid_ids]
+
+
+def fetch_full_metadata(
+    video_ids: Iterable[str],
+    workers: int = METADATA_WORKERS,
+    retries: int = METADATA_RETRIES,
+    batch_size: int = METADATA_BATCH_SIZE,
+    journal: RunJournal | None = None,
+) -> list[VideoRecord]:
+    """Fetch full metadata for specific video IDs.
+    IDs are grouped `batch_size` per yt-dlp process and up to `workers`
+    processes run at once; results keep the order of `video_ids` and IDs that
+    still fail after `retries` retries are reported.
+    `video_ids` may be a generator: fetching starts as soon as IDs arrive.
+    IDs already in `journal` are taken from it; new results are added to it.
+    """
+    print(f"[1.5/4] Buscando metadados completos ({workers} em paralelo, "
+          f"{batch_size} por processo)...")
+
+    submitted: list[str] = []
+    futures: list[tuple[list[str], Future]] = []
+    resumed: dict[str, VideoRecord] = {}
+    done = 0
+    lock = threading.Lock()
+
+    def report(future):
+        nonlocal done
+        with lock:
+            done += len(future.result())
+            print(f"   ... {done}/{len(submitted)} processados")
+
+    by_id: dict[str, VideoRecord | None] = {}
+    with METRICS.stage("metadata"), _worker_pool(workers) as pool:
+        batch: list[str] = []
+        for vid_id in chain(video_ids, [None]):
+            if vid_id is not None:
+                submitted.append(vid_id)
+                previous = journal.get("metadata", vid_id) if journal else None
+                if previous is not None:
+                    resumed[vid_id] = VideoRecord.of(previous)
+                else:
+                    batch.append(vid_id)
+            if batch and (vid_id is None or len(batch) >= max(1, batch_size)):
+                future = pool.submit(_fetch_metadata_batch, batch, retries, journal)
+                future.add_done_callback(report)
+                futures.append((batch, future))
+                batch = []
+        for batch, future in futures:
+            by_id.update(zip(batch, future.result()))
+    by_id.update(resumed)
+    results = [by_id[vid_id] for vid_id in submitted]
+
+    if resumed:
+        print(f"   {len(resumed)} vídeo(s) retomados do journal.")
+        METRICS.count("journal_resumed_metadata", len(resumed))
+    failed = [vid_id for vid_id, data in zip(submitted, results) if data is None]
+    METRICS.count("metadata_fetched", len(submitted) - len(resumed) - len(failed))
+    METRICS.count("metadata_failures", len(failed))
+    if failed:
+        print(f"   {len(failed)} vídeo(s) falharam após {retries + 1} tentativas: "
+              f"{', '.join(failed)}")
+
+    return [data for data in results if data is not None]
 
 
 def is_ragnatales_video(video: dict) -> bool:
     """Check if a video is related to RagnaTales."""
-    title = (video.get("title") or "").lower()
-    description = (video.get("description") or "").lower()
-    tags = [t.lower() for t in (video.get("tags") or [])]
-
-    # Check title and description for keywords
-    text = f"{title} {description}"
-    for kw in RAGNATALES_KEYWORDS:
-        if kw in text:
-            return True
-
-    # Check tags
-    for tag in tags:
-        if tag in RAGNATALES_TAGS:
-            return True
-        # Also check without # prefix
-        clean_tag = tag.lstrip("#")
-        if clean_tag in RAGNATALES_TAGS:
-            return True
-
-    return False
+    record = VideoRecord.of(video)
+    hits = DEFAULT_CLASSIFIER.scan(record.title_tokens, record.description_tokens)
+    return DEFAULT_CLASSIFIER.is_ragnatales(hits, record.tag_set)
 
 
 def detect_class(video: dict) -> tuple[str | None, str | None]:
     """Detect the Ragnarok class from video title/description.
     Returns (class_name, subcategory) or (None, None).
     """
-    title = (video.get("title") or "").lower()
-    description = (video.get("description") or "").lower()
-    text = f"{title} {description}"
-
-    # Exclude generic videos that mention classes but aren't class-specific
-    generic_patterns = [
-        "tier list", "melhores classes", "melhor classe",
-        "todas as vocações", "todas as classes",
-    ]
-    if any(p in title for p in generic_patterns):
-        return None, None
-
-    # Score each class by number of keyword matches
-    scores: dict[str, int] = {}
-    for class_name, aliases in CLASS_ALIASES.items():
-        score = 0
-        for alias in aliases:
-            # Use word boundary matching for short aliases to avoid false positives
-            # e.g. "mestre" in "mestre-ferreiro" should not match "Mestre" (Champion)
-            if len(alias) <= 7:
-                # Short alias: require it as standalone word in title
-                pattern = r'\b' + re.escape(alias) + r'\b'
-                if re.search(pattern, title):
-                    score += 3
-                elif re.search(pattern, description):
-                    score += 1
-            else:
-                if alias in text:
-                    if alias in title:
-                        score += 3
-                    else:
-                        score += 1
-        if score > 0:
-            scores[class_name] = score
+    record = VideoRecord.of(video)
+    return DEFAULT_CLASSIFIER.class_of(
+        DEFAULT_CLASSIFIER.scan(record.title_tokens, record.description_tokens)
+    )
 
-    if not scores:
-        return None, None
 
-    best_class = max(scores, key=scores.get)
-    subcategory = SUBCATEGORY_MAP.get(best_class, "Outros")
-    return best_class, subcategory
+def make_http_session(pool_size: int = THUMBNAIL_WORKERS) -> requests.Session:
+    """Create a Session whose connection pool fits `pool_size` threads."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=4, pool_maxsize=max(1, pool_size)
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def validate_thumbnail(
+    video_id: str, session: requests.Session | None = None, entry: dict | None = None
+) -> dict:
+    """Probe, or revalidate, the video's maxresdefault thumbnail.
+    Returns the cache entry: the (primary, fallback) `urls` decision plus the
+    response's ETag, Last-Modified and size. Given a previous `entry`, the
+    request is conditional and a 304 keeps its decision without re-deciding.
+    """
+    maxres = THUMBNAIL_URL.format(id=video_id, size="maxresdefault")
+    hqdefault = THUMBNAIL_URL.format(id=video_id, size="hqdefault")
+    now = time.time()
 
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("lastModified"):
+        headers["If-Modified-Since"] = entry["lastModified"]
 
-def check_thumbnail(video_id: str) -> tuple[str, str]:
+    limiter = limiter_for(maxres)
+    try:
+        if FIXTURES and FIXTURES.replaying:
+            resp = FIXTURES.replay_head(maxres, headers)
+        else:
+            with limiter.request() as waited, \
+                    TRACE.timed(video_id, "headSeconds") if TRACE else contextlib.nullcontext():
+                if TRACE:
+                    TRACE.add(video_id, "rateWaitSeconds", waited)
+                METRICS.count("http_requests")
+                head = session.head if session else requests.head
+                resp = head(maxres, timeout=5, allow_redirects=True, headers=headers)
+            if FIXTURES:
+                FIXTURES.record_head(maxres, resp)
+        check_throttling(limiter, resp)
+        if resp.status_code == 304 and entry:
+            METRICS.count("thumbnail_not_modified")
+            return {**entry, "checkedAt": now}
+        if resp.status_code == 200:
+            size = int(resp.headers.get("content-length", "0"))
+            # YouTube returns a small placeholder for missing maxres thumbnails
+            primary = maxres if size > 2000 else hqdefault
+            return {
+                "urls": [primary, hqdefault],
+                "checkedAt": now,
+                "etag": resp.headers.get("etag"),
+                "lastModified": resp.headers.get("last-modified"),
+                "size": size,
+            }
+    except requests.RequestException as exc:
+        if isinstance(exc, requests.Timeout):
+            limiter.throttled()
+        METRICS.count("thumbnail_failures")
+        if entry:
+            # Keep the last known decision; it is retried on the next run
+            return entry
+
+    return {"urls": [hqdefault, hqdefault], "checkedAt": now,
+            "etag": None, "lastModified": None, "size": None}
+
+
+def check_thumbnail(
+    video_id: str, session: requests.Session | None = None
+) -> tuple[str, str]:
     """Return (primary_url, fallback_url) for the video thumbnail.
     Checks if maxresdefault exists, otherwise uses hqdefault.
     """
-    maxres = f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
-    hqdefault = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
+    primary, fallback = validate_thumbnail(video_id, session)["urls"]
+    return primary, fallback
 
-    try:
-        resp = requests.head(maxres, timeout=5, allow_redirects=True)
-        if resp.status_code == 200:
-            content_length = resp.headers.get("content-length", "0")
-            # YouTube returns a small placeholder for missing maxres thumbnails
-            if int(content_length) > 2000:
-                return maxres, hqdefault
-    except requests.RequestException:
-        pass
 
-    return hqdefault, hqdefault
+# ─── Cache ────────────────────────────────────────────────────────────────────
 
+def slim_metadata(video: dict) -> dict:
+    """Keep only the yt-dlp fields used by the pipeline."""
+    return {key: video[key] for key in METADATA_FIELDS if key in video}
 
-def process_videos(videos: list[dict]) -> dict:
-    """Filter, classify and organize RagnaTales videos."""
-    print(f"[2/4] Filtrando vídeos de RagnaTales...")
 
-    ragnatales = [v for v in videos if is_ragnatales_video(v)]
-    print(f"   {len(ragnatales)} vídeos de RagnaTales encontrados.")
+class JsonCache:
+    """Dict of entries keyed by video ID (or output name), persisted as one JSON file."""
 
-    # If we only have flat data, fetch full metadata for filtered videos
-    if ragnatales and needs_full_metadata(ragnatales):
-        ids = [v.get("id") for v in ragnatales if v.get("id")]
-        ragnatales = fetch_full_metadata(ids)
-        # Re-filter with full data
-        ragnatales = [v for v in ragnatales if is_ragnatales_video(v)]
-        print(f"   Após re-filtro com metadados completos: {len(ragnatales)} vídeos.")
+    def __init__(self, path: Path, ttl_days: float = CACHE_TTL_DAYS):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.entries: dict[str, dict] = {}
+        if path.exists():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print(f"   Cache ilegível em {path}, ignorando.")
 
-    print(f"[3/4] Classificando por classe e verificando thumbnails...")
+    def get(self, vid_id: str) -> dict | None:
+        return self.entries.get(vid_id)
 
-    classes: dict[str, list[dict]] = {}
-    uncategorized: list[dict] = []
+    def put(self, vid_id: str, **fields):
+        self.entries.setdefault(vid_id, {}).update(fields)
 
-    for i, video in enumerate(ragnatales):
-        vid_id = video.get("id", "")
-        title = video.get("title", "Sem título")
-        description = video.get("description", "")
-        tags = video.get("tags") or []
-        upload_date = video.get("upload_date", "")
-
-        # Format date
-        formatted_date = ""
-        if upload_date and len(upload_date) == 8:
-            try:
-                formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-            except (ValueError, IndexError):
-                formatted_date = upload_date
+    def save(self):
+        atomic_write(self.path, lambda f: json.dump(self.entries, f, ensure_ascii=False))
 
-        # Check thumbnail
-        thumb_url, thumb_fallback = check_thumbnail(vid_id)
 
-        # Detect class
-        detected_class, subcategory = detect_class(video)
+class VideoCache(JsonCache):
+    """Per-video metadata and classification, plus the time it was fetched."""
 
-        entry = {
-            "id": vid_id,
-            "title": title,
-            "description": description[:300] if description else "",
-            "videoUrl": f"https://www.youtube.com/watch?v={vid_id}",
-            "thumbnailUrl": thumb_url,
-            "thumbnailFallback": thumb_fallback,
-            "uploadDate": formatted_date,
-            "tags": tags[:15],  # limit tags
-        }
+    def __init__(self, path: Path = VIDEO_CACHE, ttl_days: float = CACHE_TTL_DAYS):
+        super().__init__(path, ttl_days)
+
+    def is_fresh(self, vid_id: str) -> bool:
+        entry = self.entries.get(vid_id)
+        if not entry or "metadata" not in entry:
+            return False
+        return time.time() - entry.get("fetchedAt", 0) < self.ttl_seconds
+
+
+class ThumbnailCache(JsonCache):
+    """Resolved (primary, fallback) thumbnail pair per video, with the ETag,
+    Last-Modified and size of the maxresdefault response it was decided from.
+
+    Decisions are trusted for the TTL, then revalidated with a conditional
+    request (see validate_thumbnail), since YouTube sometimes generates maxres
+    only after a video is processed.
+    """
+
+    def __init__(self, path: Path = THUMBNAIL_CACHE, ttl_days: float = CACHE_TTL_DAYS):
+        super().__init__(path, ttl_days)
+
+    def lookup(self, vid_id: str) -> tuple[str, str] | None:
+        """The cached pair, or None when missing or due for revalidation."""
+        entry = self.entries.get(vid_id)
+        if not entry or time.time() - entry.get("checkedAt", 0) >= self.ttl_seconds:
+            return None
+        primary, fallback = entry["urls"]
+        return primary, fallback
+
+    def store(self, vid_id: str, entry: dict) -> tuple[str, str]:
+        self.entries[vid_id] = entry
+        primary, fallback = entry["urls"]
+        return primary, fallback
 
-        if detected_class:
-            entry["class"] = detected_class
-            entry["subcategory"] = subcategory
-            entry["contentCategory"] = "Builds"
-            if detected_class not in classes:
-                classes[detected_class] = []
-            classes[detected_class].append(entry)
+
+class DecisionCache(JsonCache):
+    """Classifications keyed by a hash of the text they were made from
+    (title, description, tags), each with the fingerprint of the rule tables.
+    Flat listing entries and full metadata hash differently, so both passes
+    over a video are cached. Entries unused in a run are dropped on save.
+    """
+
+    def __init__(self, path: Path = DECISION_CACHE):
+        super().__init__(path)
+        self.used: set[str] = set()
+
+    @staticmethod
+    def text_key(video: VideoRecord) -> str:
+        text = "\0".join([
+            video.get("title") or "", video.get("description") or "", *(video.get("tags") or []),
+        ])
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+    def lookup(self, video: VideoRecord, fingerprint: str) -> Classification | None:
+        key = self.text_key(video)
+        entry = self.entries.get(key)
+        if entry is None or entry["rules"] != fingerprint:
+            METRICS.count("decision_cache_misses")
+            return None
+        METRICS.count("decision_cache_hits")
+        self.used.add(key)
+        return Classification(*entry["decision"])
+
+    def store(self, video: VideoRecord, fingerprint: str, decision: Classification):
+        key = self.text_key(video)
+        self.entries[key] = {"rules": fingerprint, "decision": list(decision)}
+        self.used.add(key)
+
+    def save(self):
+        self.entries = {k: v for k, v in self.entries.items() if k in self.used}
+        super().save()
+
+
+def resolve_thumbnails(
+    video_ids: list[str],
+    workers: int = THUMBNAIL_WORKERS,
+    cache: ThumbnailCache | None = None,
+    journal: RunJournal | None = None,
+) -> dict[str, tuple[str, str]]:
+    """Resolve thumbnails for many videos at once.
+    Fresh cached decisions are reused; the rest are probed (or revalidated,
+    when a stale entry exists) concurrently over a single pooled session and
+    stored back into `cache`. Probes already in `journal` are taken from it;
+    new ones are added to it as they finish.
+    """
+    resolved: dict[str, tuple[str, str]] = {}
+    pending = []
+    for vid_id in video_ids:
+        hit = cache.lookup(vid_id) if cache else None
+        previous = journal.get("thumbnail", vid_id) if journal and not hit else None
+        if previous:
+            METRICS.count("journal_resumed_thumbnails")
+            hit = cache.store(vid_id, previous) if cache is not None else tuple(previous["urls"])
+        if hit:
+            resolved[vid_id] = hit
         else:
-            # Curate into content categories
-            content_cat = detect_content_category(video)
-            entry["contentCategory"] = content_cat
-            uncategorized.append(entry)
+            pending.append(vid_id)
+
+    print(f"   Thumbnails: {len(resolved)} em cache, {len(pending)} para verificar.")
+    METRICS.count("thumbnail_cache_hits", len(resolved))
+    METRICS.count("thumbnail_cache_misses", len(pending))
+    if not pending:
+        return resolved
+
+    def probe(vid_id: str) -> dict:
+        result = validate_thumbnail(vid_id, session, cache.get(vid_id) if cache else None)
+        if journal:
+            journal.record("thumbnail", vid_id, result)
+        return result
+
+    with METRICS.stage("thumbnails"), make_http_session(workers) as session, \
+            _worker_pool(workers) as pool:
+        futures = {pool.submit(probe, vid_id): vid_id for vid_id in pending}
+        for future in as_completed(futures):
+            vid_id = futures[future]
+            if cache is not None:
+                resolved[vid_id] = cache.store(vid_id, future.result())
+            else:
+                resolved[vid_id] = tuple(future.result()["urls"])
 
-        if (i + 1) % 5 == 0:
-            print(f"   ... {i + 1}/{len(ragnatales)} processados")
+    return resolved
+
+
+# ─── Video Store ──────────────────────────────────────────────────────────────
+
+def build_catalog(entries: Iterable[dict], fetch_date: str | None = None) -> dict:
+    """Organize processed entries into the exported catalog layout.
+    Builds are grouped per class (newest first); everything else stays in
+    `uncategorized` in the order given.
+    """
+    classes: dict[str, list[dict]] = {}
+    uncategorized: list[dict] = []
+    for entry in entries:
+        if entry.get("class"):
+            classes.setdefault(entry["class"], []).append(entry)
+        else:
+            uncategorized.append(entry)
 
     # Sort builds within each class by upload date (newest first)
     for class_name in classes:
@@ -486,18 +2020,901 @@ def process_videos(videos: list[dict]) -> dict:
         "classes": classes,
         "uncategorized": uncategorized,
         "totalVideos": total,
-        "fetchDate": datetime.now().strftime("%Y-%m-%d"),
+        "fetchDate": fetch_date or datetime.now().strftime("%Y-%m-%d"),
     }
 
 
-def save_json(data: dict):
-    """Save results to JSON."""
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+class VideoStore:
+    """SQLite catalog with one row per processed video.
+
+    Rows are upserted as videos are processed. `updated_at` only moves when an
+    entry's content changes, and `seen_at`/`position` record the latest run
+    that listed the video, so exports keep that run's order. A partial run
+    (see join_latest) adds its rows to the latest listing instead.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS videos (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            video_url TEXT NOT NULL,
+            thumbnail_url TEXT NOT NULL,
+            thumbnail_fallback TEXT NOT NULL,
+            upload_date TEXT NOT NULL,
+            tags TEXT NOT NULL,
+            class TEXT,
+            subcategory TEXT,
+            content_category TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            seen_at REAL NOT NULL,
+            position INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_videos_class ON videos (class);
+        CREATE INDEX IF NOT EXISTS idx_videos_content_category ON videos (content_category);
+        CREATE INDEX IF NOT EXISTS idx_videos_upload_date ON videos (upload_date);
+        CREATE INDEX IF NOT EXISTS idx_videos_updated_at ON videos (updated_at);
+        CREATE INDEX IF NOT EXISTS idx_videos_seen_at ON videos (seen_at, position);
+    """
+
+    def __init__(self, path: Path = VIDEO_DB):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.run_started = time.time()
+        self.listed_at = self.run_started
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+    def join_latest(self, shift: int = 0) -> bool:
+        """Make this run's upserts extend the latest listing rather than start
+        a new one: they take its `seen_at`, and its rows move `shift` positions
+        down to leave room at the top for newer uploads. Returns False when
+        there is no listing yet.
+        """
+        latest = self.conn.execute("SELECT MAX(seen_at) FROM videos").fetchone()[0]
+        if latest is None:
+            return False
+        self.listed_at = latest
+        self.conn.execute(
+            "UPDATE videos SET position = position + ? WHERE seen_at = ?", (shift, latest)
+        )
+        return True
+
+    def upsert(self, entry: dict, position: int):
+        """Insert or update one processed entry, seen in the current run."""
+        row = (
+            entry["id"], entry["title"], entry["description"], entry["videoUrl"],
+            entry["thumbnailUrl"], entry["thumbnailFallback"], entry["uploadDate"],
+            json.dumps(entry["tags"], ensure_ascii=False),
+            entry.get("class"), entry.get("subcategory"), entry["contentCategory"],
+        )
+        content_hash = hashlib.sha256(json.dumps(row, ensure_ascii=False).encode("utf-8")).hexdigest()
+        self.conn.execute(
+            """
+            INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                title = excluded.title,
+                description = excluded.description,
+                video_url = excluded.video_url,
+                thumbnail_url = excluded.thumbnail_url,
+                thumbnail_fallback = excluded.thumbnail_fallback,
+                upload_date = excluded.upload_date,
+                tags = excluded.tags,
+                class = excluded.class,
+                subcategory = excluded.subcategory,
+                content_category = excluded.content_category,
+                updated_at = CASE WHEN videos.content_hash = excluded.content_hash
+                    THEN videos.updated_at ELSE excluded.updated_at END,
+                content_hash = excluded.content_hash,
+                seen_at = excluded.seen_at,
+                position = excluded.position
+            """,
+            (*row, content_hash, self.run_started, self.listed_at, position),
+        )
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> dict:
+        entry = {
+            "id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "videoUrl": row["video_url"],
+            "thumbnailUrl": row["thumbnail_url"],
+            "thumbnailFallback": row["thumbnail_fallback"],
+            "uploadDate": row["upload_date"],
+            "tags": json.loads(row["tags"]),
+        }
+        if row["class"]:
+            entry["class"] = row["class"]
+            entry["subcategory"] = row["subcategory"]
+        entry["contentCategory"] = row["content_category"]
+        return entry
+
+    def get(self, vid_id: str) -> dict | None:
+        row = self.conn.execute("SELECT * FROM videos WHERE id = ?", (vid_id,)).fetchone()
+        return self._entry(row) if row else None
+
+    def query(
+        self,
+        class_name: str | None = None,
+        content_category: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[dict]:
+        """Entries matching every given filter, newest upload first.
+        `since`/`until` are inclusive YYYY-MM-DD bounds on the upload date.
+        """
+        clauses, params = [], []
+        for column, op, value in (
+            ("class", "=", class_name),
+            ("content_category", "=", content_category),
+            ("upload_date", ">=", since),
+            ("upload_date", "<=", until),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(
+            f"SELECT * FROM videos {where} ORDER BY upload_date DESC, id", params
+        )
+        return [self._entry(row) for row in rows]
+
+    def changed_since(self, timestamp: float) -> list[dict]:
+        """Entries whose content changed (or appeared) after `timestamp`."""
+        rows = self.conn.execute(
+            "SELECT * FROM videos WHERE updated_at > ? ORDER BY updated_at", (timestamp,)
+        )
+        return [self._entry(row) for row in rows]
+
+    def catalog(self, fetch_date: str | None = None) -> dict:
+        """The current listing's entries in the exported catalog layout."""
+        self.conn.commit()
+        rows = self.conn.execute(
+            "SELECT * FROM videos WHERE seen_at >= ? ORDER BY position", (self.listed_at,)
+        )
+        return build_catalog((self._entry(row) for row in rows), fetch_date)
+
+
+def make_entry(
+    video: VideoRecord,
+    decision: Classification,
+    thumbnail: tuple[str, str],
+) -> dict:
+    """Build the exported entry for one video."""
+    vid_id = video.get("id", "")
+    title = video.get("title", "Sem título")
+    description = video.get("description", "")
+    tags = video.get("tags") or []
+    upload_date = video.get("upload_date", "")
+
+    # Format date
+    formatted_date = ""
+    if upload_date and len(upload_date) == 8:
+        try:
+            formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
+        except (ValueError, IndexError):
+            formatted_date = upload_date
+
+    thumb_url, thumb_fallback = thumbnail
+
+    # Detect class
+    detected_class = decision.class_name
+    subcategory = decision.subcategory
+
+    entry = {
+        "id": vid_id,
+        "title": title,
+        "description": description[:300] if description else "",
+        "videoUrl": f"https://www.youtube.com/watch?v={vid_id}",
+        "thumbnailUrl": thumb_url,
+        "thumbnailFallback": thumb_fallback,
+        "uploadDate": formatted_date,
+        "tags": tags[:15],  # limit tags
+    }
+
+    if detected_class:
+        entry["class"] = detected_class
+        entry["subcategory"] = subcategory
+        entry["contentCategory"] = "Builds"
+    else:
+        # Curate into content categories
+        entry["contentCategory"] = decision.content_category
+    return entry
+
+
+def remember_entry(cache: VideoCache, video: VideoRecord, entry: dict, refreshed: bool):
+    """Record a processed video's metadata and classification in `cache`."""
+    vid_id = entry["id"]
+    if refreshed or not cache.get(vid_id):
+        cache.put(vid_id, metadata=slim_metadata(video), fetchedAt=time.time())
+    cache.put(
+        vid_id,
+        classification={
+            "class": entry.get("class"),
+            "subcategory": entry.get("subcategory"),
+            "contentCategory": entry["contentCategory"],
+        },
+    )
+
+
+def process_videos(
+    videos: Iterable[dict],
+    workers: int = METADATA_WORKERS,
+    batch_size: int = METADATA_BATCH_SIZE,
+    cache: VideoCache | None = None,
+    incremental: bool = False,
+    thumb_workers: int = THUMBNAIL_WORKERS,
+    thumb_cache: ThumbnailCache | None = None,
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    store: VideoStore | None = None,
+    journal: RunJournal | None = None,
+    missing: set[str] | None = None,
+) -> dict:
+    """Filter, classify and organize RagnaTales videos.
+    With `incremental`, videos with a fresh `cache` entry reuse its metadata
+    instead of being fetched again, but are classified under the current
+    rules. Each entry is also upserted into `store` when one is given. Raw
+    dicts in `videos` are turned into VideoRecords on arrival and not kept.
+    Metadata and thumbnail results are checkpointed in `journal`. IDs left
+    out because their full metadata could not be fetched are added to
+    `missing`.
+    """
+    decisions: dict[str, Classification] = {}
+
+    def keep(video: VideoRecord) -> bool:
+        with METRICS.stage("filtering"):
+            decisions[video.get("id", "")] = classifier.classify(video)
+        return decisions[video.get("id", "")].is_ragnatales
+
+    # Lazy filter: with a streamed listing, nothing below waits for it to end
+    stream = (v for v in map(VideoRecord.of, videos) if keep(v))
+    first = next(stream, None)
+    print(f"[2/4] Filtrando vídeos de RagnaTales...")
+
+    # If we only have flat data, fetch full metadata for filtered videos
+    if first is not None and needs_full_metadata([first]):
+        ids: list[str] = []
+        reused = 0
+
+        def ids_to_fetch() -> Iterator[str]:
+            nonlocal reused
+            for video in chain([first], stream):
+                vid_id = video.get("id")
+                if not vid_id:
+                    continue
+                ids.append(vid_id)
+                if incremental and cache and cache.is_fresh(vid_id):
+                    reused += 1
+                    METRICS.count("metadata_cache_hits")
+                    continue
+                if incremental and cache:
+                    METRICS.count("metadata_cache_misses")
+                yield vid_id
+
+        fetched = {v["id"]: v for v in fetch_full_metadata(
+            ids_to_fetch(), workers=workers, batch_size=batch_size, journal=journal
+        )}
+        print(f"   {len(ids)} vídeos de RagnaTales encontrados.")
+        if incremental and cache:
+            print(f"   Cache: {reused} vídeo(s) reaproveitados, {len(ids) - reused} buscados.")
+        refreshed = set(fetched)
+        ragnatales = []
+        for vid_id in ids:
+            if vid_id in fetched:
+                ragnatales.append(fetched[vid_id])
+            elif cache and cache.get(vid_id) and "metadata" in cache.get(vid_id):
+                # Fresh cache hit, or a failed fetch falling back to stale data
+                ragnatales.append(VideoRecord.of(cache.get(vid_id)["metadata"]))
+            elif missing is not None:
+                missing.add(vid_id)
+        # Re-filter with full data
+        with METRICS.stage("filtering"):
+            decisions = {v.get("id", ""): classifier.classify(v) for v in ragnatales}
+            ragnatales = [v for v in ragnatales if decisions[v.get("id", "")].is_ragnatales]
+        print(f"   Após re-filtro com metadados completos: {len(ragnatales)} vídeos.")
+    else:
+        ragnatales = [] if first is None else [first, *stream]
+        print(f"   {len(ragnatales)} vídeos de RagnaTales encontrados.")
+        refreshed = {v.get("id") for v in ragnatales}
+
+    print(f"[3/4] Classificando por classe e verificando thumbnails...")
+
+    thumbnails = resolve_thumbnails(
+        [v.get("id", "") for v in ragnatales], workers=thumb_workers, cache=thumb_cache,
+        journal=journal,
+    )
+
+    entries: list[dict] = []
+    classify_start = time.perf_counter()
+
+    for i, video in enumerate(ragnatales):
+        vid_id = video.get("id", "")
+        entry = make_entry(video, decisions[vid_id], thumbnails[vid_id])
+        entries.append(entry)
+        if store is not None:
+            store.upsert(entry, position=i)
+        if cache is not None:
+            remember_entry(cache, video, entry, vid_id in refreshed)
+
+        if (i + 1) % 5 == 0:
+            print(f"   ... {i + 1}/{len(ragnatales)} processados")
+
+    METRICS.record("classification", time.perf_counter() - classify_start)
+
+    return build_catalog(entries)
+
+
+# ─── Async Pipeline ───────────────────────────────────────────────────────────
 
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+_DONE = object()
 
-    print(f"[4/4] JSON salvo em: {OUTPUT_JSON}")
+
+async def _listing_stage(videos: Iterable[dict], classifier: Classifier,
+                         out: asyncio.Queue, consumers: int, stop: threading.Event):
+    """Drain the (blocking) listing in a thread, keeping RagnaTales entries.
+    `out.put` blocks that thread whenever the next stage falls behind; once
+    `stop` is set (a stage failed), the thread gives up and returns.
+    """
+    loop = asyncio.get_running_loop()
+
+    def produce():
+        for index, video in enumerate(map(VideoRecord.of, videos)):
+            if stop.is_set():
+                return
+            with METRICS.stage("filtering"):
+                keep = classifier.classify(video).is_ragnatales
+            if not keep:
+                continue
+            put = asyncio.run_coroutine_threadsafe(out.put((index, video)), loop)
+            while True:
+                try:
+                    put.result(timeout=ASYNC_STOP_POLL_SECONDS)
+                    break
+                except TimeoutError:
+                    if stop.is_set():
+                        put.cancel()
+                        return
+
+    try:
+        await asyncio.to_thread(produce)
+    except BaseException:
+        stop.set()
+        raise
+    for _ in range(consumers):
+        await out.put(_DONE)
+
+
+async def _metadata_stage(inp: asyncio.Queue, out: asyncio.Queue, batch_size: int,
+                          retries: int, cache: VideoCache | None, incremental: bool,
+                          journal: RunJournal | None):
+    """Turn listing entries into full metadata, `batch_size` IDs per yt-dlp call.
+    A batch is whatever is queued when the worker is free, so no one waits for
+    a batch to fill up while the listing is slow.
+    """
+    finished = False
+    while not finished:
+        item = await inp.get()
+        if item is _DONE:
+            break
+        batch = [item]
+        while len(batch) < max(1, batch_size):
+            try:
+                item = inp.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is _DONE:
+                finished = True
+                break
+            batch.append(item)
+
+        to_fetch = []
+        fetched = {}
+        for _, video in batch:
+            vid_id = video.get("id")
+            if not vid_id or not needs_full_metadata([video]):
+                continue
+            previous = journal.get("metadata", vid_id) if journal else None
+            if previous is not None:
+                METRICS.count("journal_resumed_metadata")
+                fetched[vid_id] = VideoRecord.of(previous)
+                continue
+            if incremental and cache and cache.is_fresh(vid_id):
+                METRICS.count("metadata_cache_hits")
+                continue
+            if incremental and cache:
+                METRICS.count("metadata_cache_misses")
+            to_fetch.append(vid_id)
+
+        if to_fetch:
+            with METRICS.stage("metadata"):
+                results = await asyncio.to_thread(_fetch_metadata_batch, to_fetch, retries, journal)
+            new = {vid_id: data for vid_id, data in zip(to_fetch, results) if data}
+            fetched.update(new)
+            METRICS.count("metadata_fetched", len(new))
+            METRICS.count("metadata_failures", len(to_fetch) - len(new))
+            for vid_id in set(to_fetch) - set(new):
+                print(f"   Falha ao buscar metadados de {vid_id}")
+
+        for index, video in batch:
+            vid_id = video.get("id")
+            if vid_id in fetched:
+                await out.put((index, fetched[vid_id], True))
+            elif not needs_full_metadata([video]):
+                await out.put((index, video, True))
+            elif cache and cache.get(vid_id) and "metadata" in cache.get(vid_id):
+                # Fresh cache hit, or a failed fetch falling back to stale data
+                await out.put((index, VideoRecord.of(cache.get(vid_id)["metadata"]), False))
+
+
+async def _enrich_stage(inp: asyncio.Queue, out: asyncio.Queue, classifier: Classifier,
+                        session: requests.Session, thumb_cache: ThumbnailCache | None,
+                        cache: VideoCache | None, journal: RunJournal | None):
+    """Re-filter with full metadata, then resolve the thumbnail and classify."""
+    while True:
+        item = await inp.get()
+        if item is _DONE:
+            break
+        index, video, refreshed = item
+        vid_id = video.get("id", "")
+        with METRICS.stage("filtering"):
+            decision = classifier.classify(video)
+        if not decision.is_ragnatales:
+            continue
+
+        thumbnail = thumb_cache.lookup(vid_id) if thumb_cache else None
+        METRICS.count("thumbnail_cache_hits" if thumbnail else "thumbnail_cache_misses")
+        if not thumbnail:
+            result = journal.get("thumbnail", vid_id) if journal else None
+            if result:
+                METRICS.count("journal_resumed_thumbnails")
+            else:
+                previous = thumb_cache.get(vid_id) if thumb_cache else None
+                with METRICS.stage("thumbnails"):
+                    result = await asyncio.to_thread(validate_thumbnail, vid_id, session, previous)
+                if journal:
+                    journal.record("thumbnail", vid_id, result)
+            if thumb_cache is not None:
+                thumbnail = thumb_cache.store(vid_id, result)
+            else:
+                thumbnail = tuple(result["urls"])
+
+        with METRICS.stage("classification"):
+            entry = make_entry(video, decision, thumbnail)
+        if cache is not None:
+            remember_entry(cache, video, entry, refreshed)
+        await out.put((index, entry))
+
+
+async def _process_videos_async(
+    videos: Iterable[dict],
+    workers: int,
+    batch_size: int,
+    retries: int,
+    cache: VideoCache | None,
+    incremental: bool,
+    thumb_workers: int,
+    thumb_cache: ThumbnailCache | None,
+    classifier: Classifier,
+    store: VideoStore | None,
+    journal: RunJournal | None,
+) -> dict:
+    loop = asyncio.get_running_loop()
+    # Listing thread + one thread per metadata and thumbnail worker
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=workers + thumb_workers + 1))
+
+    stop = threading.Event()
+    listed: asyncio.Queue = asyncio.Queue(ASYNC_QUEUE_SIZE)
+    full: asyncio.Queue = asyncio.Queue(ASYNC_QUEUE_SIZE)
+    done: asyncio.Queue = asyncio.Queue(ASYNC_QUEUE_SIZE)
+    entries: list[tuple[int, dict]] = []
+
+    async def sink():
+        while (item := await done.get()) is not _DONE:
+            index, entry = item
+            entries.append(item)
+            if store is not None:
+                store.upsert(entry, position=index)
+            if len(entries) % 10 == 0:
+                print(f"   ... {len(entries)} vídeos prontos")
+
+    with make_http_session(thumb_workers) as session:
+        sink_task = asyncio.create_task(sink())
+        metadata_tasks = [
+            asyncio.create_task(_metadata_stage(
+                listed, full, batch_size, retries, cache, incremental, journal
+            ))
+            for _ in range(max(1, workers))
+        ]
+        enrich_tasks = [
+            asyncio.create_task(_enrich_stage(
+                full, done, classifier, session, thumb_cache, cache, journal
+            ))
+            for _ in range(max(1, thumb_workers))
+        ]
+
+        async def drive():
+            await _listing_stage(videos, classifier, listed, len(metadata_tasks), stop)
+            await asyncio.gather(*metadata_tasks)
+            for _ in enrich_tasks:
+                await full.put(_DONE)
+            await asyncio.gather(*enrich_tasks)
+            await done.put(_DONE)
+            await sink_task
+
+        # A failed stage stops consuming its queue, which would leave everything
+        # upstream blocked on a full queue: stop the listing thread and cancel
+        # the other stages instead, then raise the failure
+        tasks = [asyncio.create_task(drive()), sink_task, *metadata_tasks, *enrich_tasks]
+        finished, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        failed = next((t for t in finished if not t.cancelled() and t.exception()), None)
+        if failed is not None:
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise failed.exception()
+
+    entries.sort(key=lambda item: item[0])
+    print(f"   {len(entries)} vídeos de RagnaTales processados.")
+    return build_catalog(entry for _, entry in entries)
+
+
+def process_videos_async(
+    videos: Iterable[dict],
+    workers: int = METADATA_WORKERS,
+    batch_size: int = METADATA_BATCH_SIZE,
+    cache: VideoCache | None = None,
+    incremental: bool = False,
+    thumb_workers: int = THUMBNAIL_WORKERS,
+    thumb_cache: ThumbnailCache | None = None,
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    store: VideoStore | None = None,
+    journal: RunJournal | None = None,
+    retries: int = METADATA_RETRIES,
+) -> dict:
+    """Same result as process_videos, with every stage running at once.
+
+    listing → filter → full metadata → thumbnail + classification → sink,
+    connected by bounded queues, so wall time approaches the slowest stage
+    instead of the sum of all of them.
+    """
+    print(f"[2-3/4] Pipeline assíncrono: listagem, metadados, thumbnails e "
+          f"classificação em paralelo...")
+    return asyncio.run(_process_videos_async(
+        videos, workers, batch_size, retries, cache, incremental,
+        thumb_workers, thumb_cache, classifier, store, journal,
+    ))
+
+
+# ─── Thumbnail Mirror ─────────────────────────────────────────────────────────
+
+class MirrorCache(JsonCache):
+    """Mirrored thumbnail per video: the source URL with its ETag and
+    Last-Modified, the content hash of the downloaded original and the
+    derivatives made from it. Entries are trusted for the TTL, then
+    revalidated with a conditional GET.
+    """
+
+    def __init__(self, path: Path = THUMBNAIL_MIRROR, ttl_days: float = CACHE_TTL_DAYS):
+        super().__init__(path, ttl_days)
+        self.originals = path.with_name(THUMBNAIL_ORIGINALS.name)
+
+    def is_fresh(self, vid_id: str, url: str, directory: Path) -> bool:
+        """Whether the mirrored copy of `url` is within the TTL and on disk."""
+        entry = self.entries.get(vid_id)
+        return bool(entry) and entry["url"] == url and "images" in entry \
+            and time.time() - entry.get("checkedAt", 0) < self.ttl_seconds \
+            and all((directory / _image_name(image)).exists() for image in entry["images"])
+
+
+def _image_name(image: dict) -> str:
+    return image["src"].rsplit("/", 1)[-1]
+
+
+def _image_formats() -> list[str]:
+    Image.init()
+    return [fmt for fmt in THUMBNAIL_FORMATS if fmt.upper() in Image.SAVE]
+
+
+def download_thumbnail(
+    url: str, session: requests.Session, entry: dict | None = None
+) -> tuple[dict | None, bytes | None]:
+    """GET `url`, conditional on `entry`'s validators when it mirrored the same
+    URL. Returns the updated entry fields and the body; the body is None when
+    the mirrored copy is still current (304) or the download failed.
+    """
+    now = time.time()
+    headers = {}
+    if entry and entry["url"] == url:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+    else:
+        entry = None
+
+    limiter = limiter_for(url)
+    try:
+        with limiter.request():
+            METRICS.count("http_requests")
+            resp = session.get(url, timeout=10, headers=headers)
+        check_throttling(limiter, resp)
+        if resp.status_code == 304 and entry:
+            METRICS.count("mirror_not_modified")
+            return {**entry, "checkedAt": now}, None
+        resp.raise_for_status()
+    except requests.RequestException as exc:
+        if isinstance(exc, requests.Timeout):
+            limiter.throttled()
+        METRICS.count("mirror_failures")
+        return entry, None
+
+    METRICS.count("mirror_downloads")
+    return {
+        "url": url,
+        "checkedAt": now,
+        "etag": resp.headers.get("etag"),
+        "lastModified": resp.headers.get("last-modified"),
+        "digest": hashlib.sha256(resp.content).hexdigest()[:20],
+    }, resp.content
+
+
+def _save_image(image, path: Path, fmt: str):
+    """Encode `image` into `path` atomically."""
+    atomic_write(path, lambda f: image.save(f, format=fmt.upper(), quality=THUMBNAIL_QUALITY),
+                 binary=True)
+
+
+def _derive_thumbnail(source: str, digest: str, directory: str) -> list[dict]:
+    """Resize one original to every THUMBNAIL_DERIVATIVES width and format.
+    Outputs are named after the original's hash, so existing ones are reused
+    as they are and only missing ones are encoded.
+    """
+    images = []
+    with Image.open(source) as original:
+        for size, width in THUMBNAIL_DERIVATIVES.items():
+            width = min(width, original.width)
+            height = round(original.height * width / original.width)
+            resized = None
+            for fmt in _image_formats():
+                name = f"{digest}-{size}.{fmt}"
+                path = Path(directory) / name
+                if not path.exists():
+                    if resized is None:
+                        resized = original.convert("RGB").resize((width, height), Image.LANCZOS)
+                    _save_image(resized, path, fmt)
+                images.append({
+                    "src": THUMBNAIL_MIRROR_URL.format(name=name), "type": f"image/{fmt}",
+                    "size": size, "width": width, "height": height,
+                })
+    return images
+
+
+def mirror_thumbnails(
+    data: dict,
+    directory: Path = THUMBNAIL_MIRROR_DIR,
+    cache: MirrorCache | None = None,
+    workers: int = THUMBNAIL_WORKERS,
+    processes: int | None = None,
+):
+    """Mirror every entry's resolved thumbnail and attach its derivatives as
+    `images` (src, MIME type, size name, width, height), in place.
+    Downloads run over a pooled session, resizing over a process pool. Fresh
+    mirrors are not requested again, and an original whose hash is unchanged
+    is not re-encoded. Derivatives and originals no entry uses are removed.
+    """
+    if Image is None:
+        print("\nPillow não instalado; espelhamento de thumbnails ignorado.")
+        return
+    cache = cache if cache is not None else MirrorCache()
+    entries = [e for builds in data["classes"].values() for e in builds] + data["uncategorized"]
+    pending = [e for e in entries if not cache.is_fresh(e["id"], e["thumbnailUrl"], directory)]
+    print(f"\nEspelhando thumbnails em {directory}: "
+          f"{len(entries) - len(pending)} em cache, {len(pending)} para baixar.")
+    directory.mkdir(parents=True, exist_ok=True)
+    cache.originals.mkdir(parents=True, exist_ok=True)
+
+    derive = []
+    if pending and not (FIXTURES and FIXTURES.replaying):
+        with METRICS.stage("mirror_download"), make_http_session(workers) as session, \
+                _worker_pool(workers) as pool:
+            futures = {}
+            for e in pending:
+                previous = cache.get(e["id"])
+                if previous and not (cache.originals / f"{previous['digest']}.jpg").exists():
+                    previous = None  # Original gone: download it again
+                futures[pool.submit(download_thumbnail, e["thumbnailUrl"], session, previous)] = e["id"]
+            for future in as_completed(futures):
+                vid_id = futures[future]
+                fields, body = future.result()
+                if fields is None:
+                    continue
+                source = cache.originals / f"{fields['digest']}.jpg"
+                if body is not None and not source.exists():
+                    atomic_write(source, lambda f: f.write(body), binary=True)
+                cache.put(vid_id, **fields)
+                if source.exists():
+                    derive.append((vid_id, str(source), fields["digest"]))
+
+    if derive:
+        with METRICS.stage("mirror_derive"):
+            args = [source for _, source, _ in derive], [digest for _, _, digest in derive]
+            if (processes or os.cpu_count() or 1) <= 1 or len(derive) == 1:
+                results = list(map(_derive_thumbnail, *args, [str(directory)] * len(derive)))
+            else:
+                with ProcessPoolExecutor(max_workers=processes) as pool:
+                    results = list(pool.map(
+                        _derive_thumbnail, *args, [str(directory)] * len(derive), chunksize=8
+                    ))
+        for (vid_id, _, _), images in zip(derive, results):
+            cache.put(vid_id, images=images)
+        METRICS.count("mirror_processed", len(derive))
+
+    for entry in entries:
+        mirrored = cache.get(entry["id"])
+        if mirrored and mirrored["url"] == entry["thumbnailUrl"] and mirrored.get("images"):
+            entry["images"] = mirrored["images"]
+
+    # Drop mirrors of videos no longer exported, then files nothing refers to
+    current = {entry["id"] for entry in entries}
+    cache.entries = {k: v for k, v in cache.entries.items() if k in current}
+    used = {_image_name(image) for v in cache.entries.values() for image in v.get("images", [])}
+    digests = {v["digest"] for v in cache.entries.values()}
+    for size in THUMBNAIL_DERIVATIVES:
+        for path in directory.glob(f"*-{size}.*"):
+            if path.name not in used:
+                path.unlink()
+    for path in cache.originals.glob("*.jpg"):
+        if path.stem not in digests:
+            path.unlink()
+    cache.save()
+    print(f"   {sum('images' in e for e in entries)} thumbnails espelhadas "
+          f"({len(derive)} baixadas ou revalidadas nesta execução).")
+
+
+# ─── Backfill ─────────────────────────────────────────────────────────────────
+
+_WORKER_CLASSIFIER: Classifier | None = None
+
+
+def _init_classify_worker(classifier: Classifier):
+    global _WORKER_CLASSIFIER
+    _WORKER_CLASSIFIER = classifier
+
+
+def _classify_chunk(chunk: list[tuple]) -> list[Classification]:
+    """Process-pool entry point: classify (title, description, tags) tuples."""
+    return [
+        _WORKER_CLASSIFIER.classify(VideoRecord(title=title, description=description, tags=tags))
+        for title, description, tags in chunk
+    ]
+
+
+def classify_parallel(
+    videos: list[VideoRecord],
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    processes: int | None = None,
+    chunk_size: int = BACKFILL_CHUNK_SIZE,
+) -> list[Classification]:
+    """Classify `videos` in `chunk_size` chunks over a process pool, in order.
+    Workers get the classifier once and only the fields it reads per video.
+    Decisions the classifier's cache already holds are not sent to the pool.
+    """
+    chunk_size = max(1, chunk_size)
+    decisions: list[Classification | None] = [None] * len(videos)
+    if classifier.decisions is not None:
+        decisions = [classifier.decisions.lookup(v, classifier.fingerprint) for v in videos]
+    missing = [i for i, decision in enumerate(decisions) if decision is None]
+    if (processes or os.cpu_count() or 1) <= 1 or len(missing) <= chunk_size:
+        for i in missing:
+            decisions[i] = classifier.classify(videos[i])
+        return decisions
+
+    fields = [(videos[i].get("title"), videos[i].get("description"), videos[i].get("tags"))
+              for i in missing]
+    chunks = [fields[i:i + chunk_size] for i in range(0, len(fields), chunk_size)]
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_classify_worker, initargs=(classifier,)
+    ) as pool:
+        results = (decision for batch in pool.map(_classify_chunk, chunks) for decision in batch)
+        for i, decision in zip(missing, results):
+            decisions[i] = decision
+            if classifier.decisions is not None:
+                classifier.decisions.store(videos[i], classifier.fingerprint, decision)
+    return decisions
+
+
+def read_dumps(paths: Iterable[Path]) -> Iterator[VideoRecord]:
+    """Yield the videos of yt-dlp `--dump-json` files (one JSON per line),
+    skipping unreadable lines and IDs already seen in an earlier line or file.
+    """
+    seen = set()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    video = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if video.get("id") in seen:
+                    continue
+                seen.add(video.get("id"))
+                yield VideoRecord.of(video)
+
+
+def backfill_videos(
+    videos: Iterable[VideoRecord],
+    processes: int | None = None,
+    chunk_size: int = BACKFILL_CHUNK_SIZE,
+    cache: VideoCache | None = None,
+    thumb_workers: int = THUMBNAIL_WORKERS,
+    thumb_cache: ThumbnailCache | None = None,
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    store: VideoStore | None = None,
+    journal: RunJournal | None = None,
+) -> dict:
+    """Same result as process_videos for already-fetched full metadata, with
+    classification sharded over `processes` processes instead of one loop.
+    """
+    videos = list(videos)
+    print(f"[2/4] Classificando {len(videos)} vídeos em até "
+          f"{processes or os.cpu_count()} processos ({chunk_size} por lote)...")
+    with METRICS.stage("classification"):
+        decisions = classify_parallel(videos, classifier, processes, chunk_size)
+    ragnatales = [(v, d) for v, d in zip(videos, decisions) if d.is_ragnatales]
+    del videos, decisions
+    METRICS.count("videos_backfilled", len(ragnatales))
+    print(f"   {len(ragnatales)} vídeos de RagnaTales encontrados.")
+
+    print(f"[3/4] Verificando thumbnails...")
+    thumbnails = resolve_thumbnails(
+        [v.get("id", "") for v, _ in ragnatales], workers=thumb_workers, cache=thumb_cache,
+        journal=journal,
+    )
+
+    entries = []
+    for i, (video, decision) in enumerate(ragnatales):
+        entry = make_entry(video, decision, thumbnails[video.get("id", "")])
+        entries.append(entry)
+        if store is not None:
+            store.upsert(entry, position=i)
+        if cache is not None:
+            remember_entry(cache, video, entry, refreshed=True)
+
+    return build_catalog(entries)
+
+
+def save_json(data: dict, path: Path | None = None, hashes_path: Path | None = None) -> bool:
+    """Save results to JSON. Returns False when the file was already up to date."""
+    path = path or OUTPUT_JSON
+    changed = write_if_changed(
+        path,
+        lambda f: json.dump(data, f, ensure_ascii=False, indent=2),
+        JSON_VOLATILE_PREFIXES,
+        hashes_path=hashes_path,
+    )
+
+    if changed:
+        print(f"[4/4] JSON salvo em: {path}")
+    else:
+        print(f"[4/4] JSON inalterado: {path}")
     print(f"\n{'='*50}")
     print(f"  Total de vídeos: {data['totalVideos']}")
     print(f"  Classes encontradas: {len(data['classes'])}")
@@ -513,116 +2930,933 @@ def save_json(data: dict):
         for cat, count in sorted(cat_counts.items()):
             print(f"    - {cat}: {count} vídeo(s)")
     print(f"{'='*50}")
+    return changed
 
 
-def generate_typescript(data: dict):
-    """Generate a constants_generated.ts file from the JSON data."""
-    print(f"\nGerando TypeScript em: {OUTPUT_TS}")
-
-    lines = [
-        '// Auto-generated by fetch_ragnatales.py',
-        f'// Generated on: {data["fetchDate"]}',
-        f'// Total videos: {data["totalVideos"]}',
-        '',
-        'import { BuildGuide } from "./types";',
-        '',
-        'export const RAGNATALES_BUILDS: BuildGuide[] = [',
-    ]
-
-    idx = 1
+def _ts_sections(data: dict) -> Iterator[tuple[str, str, list[dict]]]:
+    """Yield (section, category, builds) in the order the TS file lists them."""
     # Classified videos (Builds)
     for class_name, builds in sorted(data["classes"].items()):
-        lines.append(f'  // --- {class_name} ---')
+        yield class_name, "Builds", builds
+
+    # Curated content categories, grouped by category
+    by_category: dict[str, list] = {}
+    for build in data["uncategorized"]:
+        by_category.setdefault(build.get("contentCategory", "Outros"), []).append(build)
+    for cat_name, builds in sorted(by_category.items()):
+        if cat_name == "Outros":
+            continue  # Skip non-RagnaTales content
+        yield cat_name, cat_name, builds
+
+
+def _write_ts_entry(f, idx: int, build: dict, category: str):
+    """Write one BuildGuide object literal."""
+    is_build = category == "Builds"
+    f.write('  {\n')
+    f.write(f'    id: "ragna-{idx}",\n')
+    f.write(f'    category: "{category}",\n')
+    if is_build:
+        f.write(f'    subcategory: "{build.get("subcategory", "Outros")}",\n')
+    title_escaped = build["title"].replace('"', '\\"')
+    f.write(f'    title: "{title_escaped}",\n')
+    if is_build:
+        f.write(f'    class: "{build["class"]}",\n')
+    f.write(f'    author: "{TS_AUTHOR}",\n')
+    desc = build.get("description", "")[:200].replace('"', '\\"').replace("\n", " ")
+    f.write(f'    description: "{desc}",\n')
+    f.write(f'    imageUrl: "{build["thumbnailUrl"]}",\n')
+    f.write(f'    fallbackImageUrl: "{build["thumbnailFallback"]}",\n')
+    f.write(f'    videoUrl: "{build["videoUrl"]}",\n')
+    tags_str = json.dumps(build.get("tags", [])[:5], ensure_ascii=False)
+    f.write(f'    tags: {tags_str},\n')
+    if build.get("images"):
+        f.write(f'    images: {json.dumps(build["images"], ensure_ascii=False)},\n')
+    f.write('  },\n')
+
+
+def _compact_payload(data: dict) -> dict:
+    """Column-oriented view of the TS entries.
+    Categories, subcategories, classes and tags are interned in `strings` and
+    referenced by index (-1 = absent); standard thumbnail and video URLs are
+    reduced to the video ID plus a maxres flag. Mirrored `images` get a column
+    only when some entry has them.
+    """
+    strings: list[str] = []
+    interned: dict[str, int] = {}
+
+    def intern(value: str | None) -> int:
+        if value is None:
+            return -1
+        if value not in interned:
+            interned[value] = len(strings)
+            strings.append(value)
+        return interned[value]
+
+    columns = {
+        "ids": [], "titles": [], "descriptions": [], "category": [],
+        "subcategory": [], "class": [], "maxres": [], "tags": [], "images": [],
+    }
+    overrides: dict[int, list[str]] = {}
+    for _, category, builds in _ts_sections(data):
+        is_build = category == "Builds"
         for build in builds:
-            lines.append('  {')
-            lines.append(f'    id: "ragna-{idx}",')
-            lines.append(f'    category: "Builds",')
-            subcategory = build.get("subcategory", "Outros")
-            lines.append(f'    subcategory: "{subcategory}",')
-            title_escaped = build["title"].replace('"', '\\"')
-            lines.append(f'    title: "{title_escaped}",')
-            lines.append(f'    class: "{class_name}",')
-            lines.append(f'    author: "GekiGaming",')
-            desc = build.get("description", "")[:200].replace('"', '\\"').replace("\n", " ")
-            lines.append(f'    description: "{desc}",')
-            lines.append(f'    imageUrl: "{build["thumbnailUrl"]}",')
-            lines.append(f'    fallbackImageUrl: "{build["thumbnailFallback"]}",')
-            lines.append(f'    videoUrl: "{build["videoUrl"]}",')
-            tags_str = json.dumps(build.get("tags", [])[:5], ensure_ascii=False)
-            lines.append(f'    tags: {tags_str},')
-            lines.append('  },')
-            idx += 1
-
-    # Curated content categories
-    if data["uncategorized"]:
-        # Group by content category
-        by_category: dict[str, list] = {}
-        for build in data["uncategorized"]:
-            cat = build.get("contentCategory", "Outros")
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(build)
-
-        for cat_name, builds in sorted(by_category.items()):
-            if cat_name == "Outros":
-                continue  # Skip non-RagnaTales content
-            lines.append(f'  // --- {cat_name} ---')
-            for build in builds:
-                lines.append('  {')
-                lines.append(f'    id: "ragna-{idx}",')
-                # Map category name to ContentCategory type
-                ts_category = cat_name
-                lines.append(f'    category: "{ts_category}",')
-                title_escaped = build["title"].replace('"', '\\"')
-                lines.append(f'    title: "{title_escaped}",')
-                lines.append(f'    author: "GekiGaming",')
-                desc = build.get("description", "")[:200].replace('"', '\\"').replace("\n", " ")
-                lines.append(f'    description: "{desc}",')
-                lines.append(f'    imageUrl: "{build["thumbnailUrl"]}",')
-                lines.append(f'    fallbackImageUrl: "{build["thumbnailFallback"]}",')
-                lines.append(f'    videoUrl: "{build["videoUrl"]}",')
-                tags_str = json.dumps(build.get("tags", [])[:5], ensure_ascii=False)
-                lines.append(f'    tags: {tags_str},')
-                lines.append('  },')
-                idx += 1
-
-    lines.append('];')
-    lines.append('')
-
-    with open(OUTPUT_TS, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
-
-    print(f"TypeScript gerado com {idx - 1} builds.")
+            i = len(columns["ids"])
+            vid_id = build["id"]
+            columns["ids"].append(vid_id)
+            columns["titles"].append(build["title"])
+            columns["descriptions"].append(build.get("description", "")[:200].replace("\n", " "))
+            columns["category"].append(intern(category))
+            columns["subcategory"].append(intern(build.get("subcategory", "Outros") if is_build else None))
+            columns["class"].append(intern(build["class"] if is_build else None))
+            columns["tags"].append([intern(tag) for tag in build.get("tags", [])[:5]])
+            columns["images"].append(build.get("images"))
+
+            maxres = THUMBNAIL_URL.format(id=vid_id, size="maxresdefault")
+            hqdefault = THUMBNAIL_URL.format(id=vid_id, size="hqdefault")
+            pair = (build["thumbnailUrl"], build["thumbnailFallback"])
+            columns["maxres"].append(1 if pair[0] == maxres else 0)
+            if pair not in ((maxres, hqdefault), (hqdefault, hqdefault)) \
+                    or build["videoUrl"] != VIDEO_URL.format(id=vid_id):
+                overrides[i] = [*pair, build["videoUrl"]]
+
+    if not any(columns["images"]):
+        del columns["images"]
+    return {"strings": strings, **columns, "overrides": overrides}
+
+
+COMPACT_TS_DECODER = """\
+interface CompactData {
+  strings: string[];
+  ids: string[];
+  titles: string[];
+  descriptions: string[];
+  category: number[];
+  subcategory: number[];
+  class: number[];
+  maxres: number[];
+  tags: number[][];
+  images?: (BuildGuide["images"] | null)[];
+  overrides: Record<string, [string, string, string]>;
+}
 
+const DATA: CompactData = JSON.parse(%(payload)s);
+const S = DATA.strings;
+const thumbnail = (videoId: string, size: string) => `%(thumbnail)s`;
+
+export const RAGNATALES_BUILDS: BuildGuide[] = DATA.ids.map((videoId, i) => {
+  const override = DATA.overrides[i];
+  return {
+    id: `ragna-${i + 1}`,
+    category: S[DATA.category[i]] as ContentCategory,
+    ...(DATA.subcategory[i] >= 0 ? { subcategory: S[DATA.subcategory[i]] } : {}),
+    title: DATA.titles[i],
+    ...(DATA.class[i] >= 0 ? { class: S[DATA.class[i]] } : {}),
+    author: %(author)s,
+    description: DATA.descriptions[i],
+    imageUrl: override ? override[0] : thumbnail(videoId, DATA.maxres[i] ? "maxresdefault" : "hqdefault"),
+    fallbackImageUrl: override ? override[1] : thumbnail(videoId, "hqdefault"),
+    videoUrl: override ? override[2] : `%(video)s`,
+    tags: DATA.tags[i].map((t) => S[t]),
+    ...(DATA.images?.[i] ? { images: DATA.images[i] } : {}),
+  };
+});
+"""
 
-# ─── Main ─────────────────────────────────────────────────────────────────────
 
-def main():
-    generate_ts = "--generate-ts" in sys.argv
+def generate_typescript(
+    data: dict,
+    compact: bool = False,
+    path: Path | None = None,
+    hashes_path: Path | None = None,
+) -> bool:
+    """Generate a constants_generated.ts file from the JSON data.
+    Entries are streamed through a buffered file handle. With `compact`, the
+    array is instead rebuilt on the client from a deduplicated, column-oriented
+    JSON payload, which is smaller to ship and cheaper to parse.
+    Returns False when the file was already up to date.
+    """
+    path = path or OUTPUT_TS
+    print(f"\nGerando TypeScript em: {path}")
+    count = 0
+
+    def render(f):
+        nonlocal count
+        f.write('// Auto-generated by fetch_ragnatales.py\n')
+        f.write(f'// Generated on: {data["fetchDate"]}\n')
+        f.write(f'// Total videos: {data["totalVideos"]}\n')
+        f.write('\n')
+
+        if compact:
+            payload = _compact_payload(data)
+            count = len(payload["ids"])
+            f.write('import { BuildGuide, ContentCategory } from "./types";\n')
+            f.write('\n')
+            f.write(COMPACT_TS_DECODER % {
+                "payload": json.dumps(
+                    json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+                    ensure_ascii=False,
+                ),
+                "author": json.dumps(TS_AUTHOR),
+                "thumbnail": THUMBNAIL_URL.replace("{id}", "${videoId}").replace("{size}", "${size}"),
+                "video": VIDEO_URL.replace("{id}", "${videoId}"),
+            })
+        else:
+            f.write('import { BuildGuide } from "./types";\n')
+            f.write('\n')
+            f.write('export const RAGNATALES_BUILDS: BuildGuide[] = [\n')
+            for section, category, builds in _ts_sections(data):
+                f.write(f'  // --- {section} ---\n')
+                for build in builds:
+                    count += 1
+                    _write_ts_entry(f, count, build, category)
+            f.write('];\n')
+
+    changed = write_if_changed(
+        path, render, TS_VOLATILE_PREFIXES, buffering=TS_WRITE_BUFFER, hashes_path=hashes_path
+    )
+    if changed:
+        print(f"TypeScript gerado com {count} builds.")
+    else:
+        print(f"TypeScript inalterado ({count} builds).")
+    return changed
+
+
+SEARCH_INDEX_TS = """\
+export interface SearchIndex {
+  /** Chunk of each entry; entry `i` is `ragna-${i + 1}`. */
+  chunk: number[];
+  chunks: string[];
+  /** Normalized title and tag token → entry numbers, ascending. */
+  tokens: Record<string, number[]>;
+  facets: {
+    class: Record<string, number>;
+    category: Record<string, number>;
+    subcategory: Record<string, number>;
+  };
+}
 
-    # Step 1: Fetch all videos
-    videos = fetch_channel_videos()
+export const SEARCH_INDEX: SearchIndex = JSON.parse(%(payload)s);
 
-    if not videos:
-        print("Nenhum vídeo encontrado. Verifique se yt-dlp está instalado.")
-        sys.exit(1)
+/** Lazy loaders, one per chunk; each resolves to its slice of the catalog. */
+export const CHUNKS: Record<string, () => Promise<{ default: BuildGuide[] }>> = {
+%(loaders)s};
+
+/** Same normalization as the index: accents folded, lowercased, split on non-alphanumerics. */
+export const tokenize = (text: string): string[] =>
+  text.normalize("NFKD").replace(/[\\u0300-\\u036f]/g, "").toLowerCase().match(/[\\p{L}\\p{N}]+/gu) ?? [];
+"""
+
+
+def _chunk_name(section: str, category: str) -> str:
+    """File stem of a section's chunk: "class-super-novice", "category-patch-notes"."""
+    slug = re.sub(r"[^a-z0-9]+", "-", fold_accents(section).lower()).strip("-")
+    return f"{'class' if category == 'Builds' else 'category'}-{slug}"
+
+
+def _search_index(data: dict) -> tuple[dict, list[tuple[str, str, list[dict]]]]:
+    """Token → entry numbers and facet counts over the TS entries, plus the
+    (chunk name, category, builds) list the entries are numbered from.
+    """
+    chunks = [(_chunk_name(section, category), category, builds)
+              for section, category, builds in _ts_sections(data)]
+    chunk_of: list[int] = []
+    tokens: dict[str, list[int]] = {}
+    facets: dict[str, dict[str, int]] = {"class": {}, "category": {}, "subcategory": {}}
+    for c, (_, category, builds) in enumerate(chunks):
+        for build in builds:
+            i = len(chunk_of)
+            chunk_of.append(c)
+            text = " ".join([build["title"], *build.get("tags", [])[:5]])
+            for token in dict.fromkeys(tokenize(text)):
+                tokens.setdefault(token, []).append(i)
+            facets["category"][category] = facets["category"].get(category, 0) + 1
+            if category == "Builds":
+                for facet, value in (("class", build["class"]),
+                                     ("subcategory", build.get("subcategory", "Outros"))):
+                    facets[facet][value] = facets[facet].get(value, 0) + 1
+    index = {
+        "chunk": chunk_of,
+        "chunks": [name for name, _, _ in chunks],
+        "tokens": dict(sorted(tokens.items())),
+        "facets": facets,
+    }
+    return index, chunks
+
+
+def generate_ts_chunks(data: dict, directory: Path, hashes_path: Path | None = None) -> bool:
+    """Split the TS export into one lazily importable module per class and per
+    content category, plus an `index.ts` carrying only the search index (title
+    and tag tokens → entry numbers, facet counts) and the chunk loaders.
+    Entries keep the `ragna-N` IDs of constants_generated.ts. Chunks of
+    sections that no longer exist are removed.
+    Returns False when every file was already up to date.
+    """
+    print(f"\nGerando chunks TypeScript em: {directory}")
+    index, chunks = _search_index(data)
+    header = ('// Auto-generated by fetch_ragnatales.py\n'
+              f'// Generated on: {data["fetchDate"]}\n')
+    changed = False
+    count = 0
+    for name, category, builds in chunks:
+        def render(f, builds=builds, category=category, first=count + 1):
+            f.write(header)
+            f.write(f'// {len(builds)} videos\n\n')
+            f.write('import { BuildGuide } from "../types";\n\n')
+            f.write('const BUILDS: BuildGuide[] = [\n')
+            for idx, build in enumerate(builds, first):
+                _write_ts_entry(f, idx, build, category)
+            f.write('];\n\nexport default BUILDS;\n')
+
+        changed = write_if_changed(
+            directory / f"{name}.ts", render, TS_VOLATILE_PREFIXES,
+            buffering=TS_WRITE_BUFFER, hashes_path=hashes_path,
+        ) or changed
+        count += len(builds)
+
+    def render_index(f):
+        f.write(header)
+        f.write(f'// Total videos: {count}\n\n')
+        f.write('import { BuildGuide } from "../types";\n\n')
+        f.write(SEARCH_INDEX_TS % {
+            "payload": json.dumps(
+                json.dumps(index, ensure_ascii=False, separators=(",", ":")),
+                ensure_ascii=False,
+            ),
+            "loaders": "".join(f'  "{name}": () => import("./{name}"),\n'
+                               for name in index["chunks"]),
+        })
+
+    changed = write_if_changed(
+        directory / "index.ts", render_index, TS_VOLATILE_PREFIXES,
+        buffering=TS_WRITE_BUFFER, hashes_path=hashes_path,
+    ) or changed
+
+    current = {f"{name}.ts" for name in index["chunks"]}
+    for stale in chain(directory.glob("class-*.ts"), directory.glob("category-*.ts")):
+        if stale.name not in current:
+            stale.unlink()
+            changed = True
+
+    print(f"{len(chunks)} chunks e índice com {len(index['tokens'])} termos "
+          f"({'atualizados' if changed else 'inalterados'}).")
+    return changed
+
+
+# ─── Jobs ─────────────────────────────────────────────────────────────────────
+
+@dataclass
+class RunOptions:
+    """Command-line tuning shared by every job of a run."""
+    workers: int = METADATA_WORKERS
+    batch_size: int = METADATA_BATCH_SIZE
+    incremental: bool = False
+    ttl_days: float = CACHE_TTL_DAYS
+    thumb_workers: int = THUMBNAIL_WORKERS
+    use_async: bool = False
+    rate_limits: dict = field(default_factory=dict)
+    backfill: list[Path] = field(default_factory=list)
+    backfill_workers: int | None = None
+    resume: bool = False
+    record: Path | None = None
+    replay: Path | None = None
+    watch: bool = False
+    watch_interval: float = WATCH_INTERVAL_SECONDS
+    watch_newest: int = WATCH_NEWEST
+    watch_cycles: int | None = None
+
+    @classmethod
+    def from_argv(cls) -> "RunOptions":
+        return cls(
+            workers=int(get_flag_value("--workers", str(METADATA_WORKERS))),
+            batch_size=int(get_flag_value("--batch-size", str(METADATA_BATCH_SIZE))),
+            incremental="--incremental" in sys.argv,
+            ttl_days=float(get_flag_value("--cache-ttl", str(CACHE_TTL_DAYS))),
+            thumb_workers=int(get_flag_value("--thumb-workers", str(THUMBNAIL_WORKERS))),
+            use_async="--async" in sys.argv,
+            rate_limits=parse_rate_limits(get_flag_value("--rate-limit", "")),
+            backfill=[Path(p) for p in get_flag_value("--backfill", "").split(",") if p],
+            backfill_workers=int(get_flag_value("--backfill-workers", "0")) or None,
+            resume="--resume" in sys.argv,
+            record=Path(record) if (record := get_flag_value("--record")) else None,
+            replay=Path(replay) if (replay := get_flag_value("--replay")) else None,
+            watch="--watch" in sys.argv,
+            watch_interval=float(get_flag_value("--watch-interval", str(WATCH_INTERVAL_SECONDS))),
+            watch_newest=int(get_flag_value("--watch-newest", str(WATCH_NEWEST))),
+            watch_cycles=int(get_flag_value("--watch-cycles", "0")) or None,
+        )
+
+
+@dataclass
+class ChannelJob:
+    """One channel (or game/server variant) to catalog: where to list it,
+    which tables classify it and where its outputs go.
+    """
+    name: str
+    channel_url: str
+    output_json: Path
+    store_path: Path
+    cache_dir: Path
+    metrics_json: Path
+    output_ts: Path | None = None
+    compact_ts: bool = False
+    ts_chunks: bool = False
+    mirror_dir: Path | None = None
+    feed_url: str | None = None
+    keywords: list[str] = field(default_factory=lambda: list(RAGNATALES_KEYWORDS))
+    tags: set[str] = field(default_factory=lambda: set(RAGNATALES_TAGS))
+    class_aliases: dict = field(default_factory=lambda: dict(CLASS_ALIASES))
+    subcategory_map: dict = field(default_factory=lambda: dict(SUBCATEGORY_MAP))
+    series_patterns: dict = field(default_factory=lambda: dict(SERIES_PATTERNS))
+    category_patterns: dict = field(default_factory=lambda: dict(CATEGORY_PATTERNS))
+    generic_patterns: list[str] = field(default_factory=lambda: list(GENERIC_PATTERNS))
+
+    @classmethod
+    def default(
+        cls,
+        generate_ts: bool = False,
+        compact_ts: bool = False,
+        ts_chunks: bool = False,
+        mirror_thumbnails: bool = False,
+        feed_url: str | None = None,
+    ) -> "ChannelJob":
+        """The original single-channel RagnaTales job."""
+        return cls(
+            name="ragnatales",
+            channel_url=CHANNEL_URL,
+            output_json=OUTPUT_JSON,
+            store_path=VIDEO_DB,
+            cache_dir=CACHE_DIR,
+            metrics_json=METRICS_JSON,
+            output_ts=OUTPUT_TS if generate_ts else None,
+            compact_ts=compact_ts,
+            ts_chunks=ts_chunks,
+            mirror_dir=THUMBNAIL_MIRROR_DIR if mirror_thumbnails else None,
+            feed_url=feed_url,
+        )
+
+    @classmethod
+    def from_config(cls, config: dict, base_dir: Path) -> "ChannelJob":
+        """Build a job from one entry of a jobs file. Relative paths resolve
+        against the file's directory; omitted tables use the RagnaTales ones.
+        """
+        name = config["name"]
+        output_dir = base_dir / config.get("outputDir", f"output/{name}")
+        output_ts = config.get("outputTs")
+        mirror_dir = config.get("mirrorDir")
+        job = cls(
+            name=name,
+            channel_url=config["channelUrl"],
+            output_json=output_dir / f"{name}_videos.json",
+            store_path=output_dir / f"{name}_videos.sqlite",
+            cache_dir=output_dir / "cache",
+            metrics_json=output_dir / "metrics.json",
+            output_ts=base_dir / output_ts if output_ts else None,
+            compact_ts=config.get("compactTs", False),
+            ts_chunks=config.get("tsChunks", False),
+            mirror_dir=base_dir / mirror_dir if mirror_dir else None,
+            feed_url=config.get("feedUrl"),
+        )
+        tables = {
+            "keywords": "keywords", "tags": "tags", "classAliases": "class_aliases",
+            "subcategoryMap": "subcategory_map", "seriesPatterns": "series_patterns",
+            "categoryPatterns": "category_patterns", "genericPatterns": "generic_patterns",
+        }
+        for key, attr in tables.items():
+            if key in config:
+                setattr(job, attr, config[key])
+        return job
+
+    def classifier(self, decisions: DecisionCache | None = None) -> Classifier:
+        return Classifier(
+            keywords=self.keywords,
+            tags=self.tags,
+            class_aliases=self.class_aliases,
+            subcategory_map=self.subcategory_map,
+            series_patterns=self.series_patterns,
+            category_patterns=self.category_patterns,
+            generic_patterns=self.generic_patterns,
+            decisions=decisions,
+        )
+
+
+def load_jobs(path: Path) -> list[ChannelJob]:
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return [ChannelJob.from_config(job, path.parent) for job in config["jobs"]]
+
+
+def run_job(job: ChannelJob, options: RunOptions) -> bool:
+    """Run the whole pipeline for one job. Returns whether any output changed."""
+    decisions = DecisionCache(job.cache_dir / DECISION_CACHE.name)
+    classifier = job.classifier(decisions)
+    cache = VideoCache(job.cache_dir / VIDEO_CACHE.name, ttl_days=options.ttl_days)
+    thumb_cache = ThumbnailCache(job.cache_dir / THUMBNAIL_CACHE.name, ttl_days=options.ttl_days)
+    configure_rate_limits(options.rate_limits)
+    use_fixtures(options.replay or options.record, "replay" if options.replay else "record")
+    journal = RunJournal(job.cache_dir / JOURNAL.name, resume=options.resume)
 
     # Step 2-3: Filter, classify, check thumbnails
-    data = process_videos(videos)
+    with VideoStore(job.store_path) as store:
+        try:
+            if options.backfill:
+                # Backfill: the metadata is already in yt-dlp dumps, no listing
+                data = backfill_videos(
+                    read_dumps(options.backfill),
+                    processes=options.backfill_workers,
+                    cache=cache,
+                    thumb_workers=options.thumb_workers,
+                    thumb_cache=thumb_cache,
+                    classifier=classifier,
+                    store=store,
+                    journal=journal,
+                )
+            else:
+                # Step 1: Stream the channel listing; processing consumes it as it arrives
+                data = (process_videos_async if options.use_async else process_videos)(
+                    stream_channel_videos(classifier, channel_url=job.channel_url, journal=journal),
+                    workers=options.workers,
+                    batch_size=options.batch_size,
+                    cache=cache,
+                    incremental=options.incremental,
+                    thumb_workers=options.thumb_workers,
+                    thumb_cache=thumb_cache,
+                    classifier=classifier,
+                    store=store,
+                    journal=journal,
+                )
+        except BaseException:
+            journal.close()
+            print(f"Execução interrompida; o progresso está em {journal.path}, "
+                  f"retome com --resume.")
+            raise
+        cache.save()
+        thumb_cache.save()
+        decisions.save()
+        journal.finish()
+
+        if data["totalVideos"] == 0:
+            print("Nenhum vídeo de RagnaTales encontrado.")
+            sys.exit(0)
+
+        # Exports are generated from the store
+        data = store.catalog(data["fetchDate"])
+
+    return export_job(job, options, data)
+
+
+def export_job(job: ChannelJob, options: RunOptions, data: dict) -> bool:
+    """Write the job's outputs from the catalog `data`. Returns whether any changed."""
+    hashes_path = job.cache_dir / OUTPUT_HASHES.name
+
+    # Optional: Mirror thumbnails and attach their resized derivatives
+    if job.mirror_dir:
+        mirror_thumbnails(
+            data,
+            job.mirror_dir,
+            MirrorCache(job.cache_dir / THUMBNAIL_MIRROR.name, ttl_days=options.ttl_days),
+            workers=options.thumb_workers,
+        )
+
+    with METRICS.stage("export"):
+        # Step 4: Save
+        changed = save_json(data, job.output_json, hashes_path)
+
+        # Optional: Generate TypeScript
+        if job.output_ts:
+            changed = generate_typescript(
+                data, compact=job.compact_ts, path=job.output_ts, hashes_path=hashes_path
+            ) or changed
+            if job.ts_chunks:
+                # Sibling directory: constants_generated.ts → constants_generated/
+                changed = generate_ts_chunks(
+                    data, job.output_ts.with_suffix(""), hashes_path
+                ) or changed
+
+    return changed
+
+
+def _run_job_isolated(job: ChannelJob, options: RunOptions) -> dict:
+    """Process-pool entry point: run one job with its own log and metrics,
+    turning any failure (including sys.exit) into a result instead of an error.
+    """
+    global METRICS
+    METRICS = RunMetrics()
+    log_path = job.metrics_json.with_name("run.log")
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    result = {"name": job.name, "status": "ok", "changed": False, "log": str(log_path)}
+    with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        try:
+            result["changed"] = run_job(job, options)
+        except SystemExit as exc:
+            if exc.code not in (0, None):
+                result.update(status="failed", error=f"exit {exc.code}")
+        except Exception as exc:
+            result.update(status="failed", error=repr(exc))
+        finally:
+            METRICS.save(job.metrics_json)
+    result["seconds"] = METRICS.summary()["totalSeconds"]
+    return result
+
+
+def run_jobs(jobs: list[ChannelJob], options: RunOptions, processes: int | None = None) -> list[dict]:
+    """Run jobs in parallel, one process each, so one channel's listing overlaps
+    another's classification and export. A failing job does not stop the others.
+    The per-host rate limits are divided between the processes.
+    """
+    processes = min(processes or len(jobs), len(jobs))
+    print(f"Rodando {len(jobs)} job(s) em até {processes} processos...")
+    # Every process gets its share of the per-host budget, not all of it
+    options = replace(options, rate_limits=share_rate_limits(options.rate_limits, processes))
+    results = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(_run_job_isolated, job, options): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:  # worker process died
+                result = {"name": job.name, "status": "failed", "error": repr(exc)}
+            results.append(result)
+            status = "alterado" if result.get("changed") else "inalterado"
+            if result["status"] != "ok":
+                status = f"FALHOU ({result['error']})"
+            print(f"   - {result['name']}: {status}")
+    return results
+
+
+# ─── Watch ────────────────────────────────────────────────────────────────────
+
+def poll_feed(feed_url: str) -> list[dict]:
+    """Entries of a channel's RSS (Atom) feed, newest first: id, title, description."""
+    limiter = limiter_for(feed_url)
+    with limiter.request():
+        METRICS.count("http_requests")
+        resp = requests.get(feed_url, timeout=10)
+    check_throttling(limiter, resp)
+    resp.raise_for_status()
+    root = ElementTree.fromstring(resp.content)
+    return [
+        {
+            "id": entry.findtext("yt:videoId", "", FEED_NAMESPACES),
+            "title": entry.findtext("atom:title", "", FEED_NAMESPACES),
+            "description": entry.findtext("media:group/media:description", "", FEED_NAMESPACES),
+        }
+        for entry in root.iterfind("atom:entry", FEED_NAMESPACES)
+    ]
+
+
+def poll_listing(channel_url: str, newest: int) -> list[dict]:
+    """The first `newest` entries of the channel's flat yt-dlp listing: id, title.
+    Raises CalledProcessError when yt-dlp fails, since a partial listing would
+    not tell missing videos from a failed poll.
+    """
+    cmd = [
+        "yt-dlp",
+        "--flat-playlist",
+        "--dump-json",
+        "--no-warnings",
+        "--playlist-end", str(newest),
+        "--extractor-args", "youtube:lang=pt",
+        f"{channel_url}/videos",
+    ]
+    polled = []
+    stream = _stream_json_lines(cmd, limiter_for(cmd[-1]))
+    while True:
+        try:
+            data = next(stream)
+        except StopIteration as stop:
+            returncode = stop.value
+            break
+        if data.get("id"):
+            polled.append({"id": data["id"], "title": data.get("title") or ""})
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return polled
+
+
+class WatchState(JsonCache):
+    """Text key (title and, from feeds, description) of every video a watch
+    poll has seen, RagnaTales or not, so later polls only act on new IDs and
+    edited videos.
+    """
+
+    def __init__(self, path: Path = WATCH_STATE):
+        super().__init__(path)
+
+    @staticmethod
+    def text_key(video: dict) -> str:
+        text = f"{video['title']}\0{video.get('description', '')}"
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
 
-    if data["totalVideos"] == 0:
-        print("Nenhum vídeo de RagnaTales encontrado.")
-        sys.exit(0)
+    def pending(self, videos: list[dict]) -> list[dict]:
+        return [v for v in videos if (self.get(v["id"]) or {}).get("text") != self.text_key(v)]
 
-    # Step 4: Save
-    save_json(data)
+    def remember(self, videos: list[dict]):
+        for video in videos:
+            self.put(video["id"], text=self.text_key(video))
 
-    # Optional: Generate TypeScript
-    if generate_ts:
-        generate_typescript(data)
+
+def watch_once(job: ChannelJob, options: RunOptions, state: WatchState) -> bool:
+    """One poll: diff the newest uploads against `state` and, if any is new or
+    edited, run the polled videos through the pipeline on top of the store's
+    latest listing and re-export. Unchanged ones are served from the caches;
+    new and edited ones are fetched. A video whose fetch failed is not marked
+    as seen, so the next poll retries it. Returns whether any output changed.
+    """
+    print(f"\n[{datetime.now():%H:%M:%S}] Verificando os {options.watch_newest} vídeos mais recentes...")
+    with METRICS.stage("listing"):
+        if job.feed_url:
+            polled = poll_feed(job.feed_url)[:options.watch_newest]
+        else:
+            polled = poll_listing(job.channel_url, options.watch_newest)
+    pending = state.pending(polled)
+    METRICS.count("watch_polls")
+    if not pending:
+        print("   Nada novo.")
+        return False
+    METRICS.count("watch_pending", len(pending))
+    print(f"   {len(pending)} vídeo(s) novos ou alterados: {', '.join(v['id'] for v in pending)}")
+
+    cache = VideoCache(job.cache_dir / VIDEO_CACHE.name, ttl_days=options.ttl_days)
+    thumb_cache = ThumbnailCache(job.cache_dir / THUMBNAIL_CACHE.name, ttl_days=options.ttl_days)
+    for video in pending:
+        if state.get(video["id"]):
+            # Edited since the last poll: fetch and classify it again
+            cache.entries.pop(video["id"], None)
+
+    missing: set[str] = set()
+    with VideoStore(job.store_path) as store:
+        store.join_latest(shift=len(polled))
+        data = process_videos(
+            (VideoRecord(id=v["id"], title=v["title"]) for v in polled),
+            workers=options.workers,
+            batch_size=options.batch_size,
+            cache=cache,
+            incremental=True,
+            thumb_workers=options.thumb_workers,
+            thumb_cache=thumb_cache,
+            classifier=job.classifier(),
+            store=store,
+            missing=missing,
+        )
+        data = store.catalog(data["fetchDate"])
+    cache.save()
+    thumb_cache.save()
+    if missing:
+        print(f"   {len(missing)} vídeo(s) serão tentados de novo na próxima verificação.")
+    state.remember([v for v in polled if v["id"] not in missing])
+    state.save()
+    return export_job(job, options, data)
+
+
+def watch_job(job: ChannelJob, options: RunOptions):
+    """Poll the channel every `options.watch_interval` seconds (see watch_once),
+    starting with a full run when the store is still empty. Stops after
+    `options.watch_cycles` polls, or on Ctrl-C; a failed poll is retried on
+    the next cycle.
+    """
+    configure_rate_limits(options.rate_limits)
+    use_fixtures(options.replay or options.record, "replay" if options.replay else "record")
+    state = WatchState(job.cache_dir / WATCH_STATE.name)
+    with VideoStore(job.store_path) as store:
+        empty = not len(store)
+    if empty:
+        print("Banco vazio: fazendo uma execução completa antes de vigiar o canal.")
+        run_job(job, options)
+
+    source = job.feed_url or f"{job.channel_url}/videos (--playlist-end {options.watch_newest})"
+    print(f"Vigiando {source} a cada {options.watch_interval:g}s. Ctrl-C para parar.")
+    cycle = 0
+    while options.watch_cycles is None or cycle < options.watch_cycles:
+        if cycle:
+            time.sleep(options.watch_interval)
+        cycle += 1
+        try:
+            changed = watch_once(job, options, state)
+        except (requests.RequestException, ElementTree.ParseError,
+                subprocess.CalledProcessError) as exc:
+            METRICS.count("watch_failures")
+            print(f"   Falha ao verificar o canal: {exc!r}")
+            continue
+        print("   Saídas atualizadas." if changed else "   Nenhuma saída mudou.")
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def get_flag_value(flag: str, default: str | None = None) -> str | None:
+    """Return the value given to `flag` on the command line.
+    Accepts both `--flag value` and `--flag=value`.
+    """
+    for i, arg in enumerate(sys.argv):
+        if arg == flag and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(f"{flag}="):
+            return arg.split("=", 1)[1]
+    return default
+
+
+def print_query(spec: str, path: Path = VIDEO_DB):
+    """Print store entries matching `key=value,...` (class, category, since, until)."""
+    filters = dict(part.split("=", 1) for part in spec.split(",") if part)
+    with VideoStore(path) as store:
+        entries = store.query(
+            class_name=filters.get("class"),
+            content_category=filters.get("category"),
+            since=filters.get("since"),
+            until=filters.get("until"),
+        )
+    for entry in entries:
+        print(json.dumps(entry, ensure_ascii=False))
+    print(f"{len(entries)} vídeo(s).", file=sys.stderr)
+
+
+def verify_catalog(path: Path, classifier: Classifier = DEFAULT_CLASSIFIER) -> int:
+    """Re-classify every entry of an exported JSON and print the ones whose
+    class or content category would change. Returns how many differ.
+    Exported descriptions are cut at 300 characters, so the check only sees
+    that much of each description.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    entries = [e for builds in data["classes"].values() for e in builds] + data["uncategorized"]
+    differ = 0
+    for entry in entries:
+        decision = classifier.classify(entry)
+        before = (entry.get("class"), entry["contentCategory"])
+        after = (decision.class_name, decision.content_category)
+        if before != after:
+            differ += 1
+            print(f"  {entry['id']}: {before} → {after}  {entry['title'][:60]}")
+    print(f"{len(entries)} vídeo(s) verificados, {differ} com classificação diferente.")
+    return differ
+
+
+def _format_hits(found: dict[str, list[tuple[str, int]]]) -> str:
+    """`Paladino 4 ← "paladino" (título), "pala" (descrição)`, best score first."""
+    where = {3: "título", 1: "descrição"}
+    return "; ".join(
+        f"{name} {sum(w for _, w in hits)} ← "
+        + ", ".join(f'"{pattern}" ({where[w]})' for pattern, w in hits)
+        for name, hits in sorted(found.items(), key=lambda item: -sum(w for _, w in item[1]))
+    ) or "-"
+
+
+def explain_videos(spec: str, cache_path: Path = VIDEO_CACHE,
+                   classifier: Classifier = DEFAULT_CLASSIFIER) -> int:
+    """Re-classify cached videos (comma-separated IDs, or "all") under the
+    current tables and print the patterns behind every score, next to the
+    classification the cache holds. With "all", only videos whose
+    classification would change are printed. Returns how many change.
+    """
+    cache = VideoCache(cache_path)
+    ids = list(cache.entries) if spec == "all" else [i for i in spec.split(",") if i]
+    explained = changed = 0
+    for vid_id in ids:
+        entry = cache.get(vid_id)
+        if not entry or "metadata" not in entry:
+            print(f"{vid_id}: não está no cache ({cache_path}).")
+            continue
+        explained += 1
+        report = classifier.explain(entry["metadata"])
+        decision = report["decision"]
+        after = (decision.class_name, decision.content_category)
+        before = entry.get("classification", {})
+        before = (before.get("class"), before.get("contentCategory"))
+        if before != after:
+            changed += 1
+        elif spec == "all":
+            continue
+        print(f"\n{vid_id}  {entry['metadata'].get('title', '')[:70]}")
+        print(f"  decisão: {after[0] or '-'} / {after[1]}"
+              + (f"  (no cache: {before[0] or '-'} / {before[1]})" if before != after else "")
+              + ("" if decision.is_ragnatales else "  [não é RagnaTales]"))
+        print(f"  RagnaTales: palavras {report['keywords'] or '-'}, tags {report['tags'] or '-'}")
+        if report["generic"]:
+            print(f"  genérico no título (sem classe): {report['generic']}")
+        print(f"  classes: {_format_hits(report['classes'])}")
+        for category, patterns in report["series"].items():
+            print(f"  série {category}: {patterns}")
+        print(f"  categorias: {_format_hits(report['categories'])}")
+    print(f"\n{explained} vídeo(s) explicados, {changed} com classificação diferente do cache.")
+    return changed
+
+
+def run():
+    options = RunOptions.from_argv()
+
+    jobs_file = get_flag_value("--jobs")
+    if jobs_file:
+        processes = get_flag_value("--job-workers")
+        results = run_jobs(load_jobs(Path(jobs_file)), options, int(processes) if processes else None)
+        if any(r["status"] != "ok" for r in results):
+            sys.exit(1)
+        if not any(r.get("changed") for r in results):
+            print("\nNenhuma saída mudou.")
+            if "--exit-code" in sys.argv:
+                sys.exit(EXIT_UNCHANGED)
+        print("\nDone!")
+        return
+
+    job = ChannelJob.default(
+        generate_ts="--generate-ts" in sys.argv,
+        compact_ts="--compact-ts" in sys.argv,
+        ts_chunks="--ts-chunks" in sys.argv,
+        mirror_thumbnails="--mirror-thumbnails" in sys.argv,
+        feed_url=get_flag_value("--feed-url"),
+    )
+    if options.watch:
+        watch_job(job, options)
+        return
+    changed = run_job(job, options)
+
+    if not changed:
+        print("\nNenhuma saída mudou.")
+        if "--exit-code" in sys.argv:
+            sys.exit(EXIT_UNCHANGED)
 
     print("\nDone!")
 
 
+def main():
+    query = get_flag_value("--query")
+    if query is not None:
+        print_query(query, Path(get_flag_value("--db", str(VIDEO_DB))))
+        return
+    verify = get_flag_value("--verify-classifier")
+    if verify is not None:
+        sys.exit(1 if verify_catalog(Path(verify)) else 0)
+    explain = get_flag_value("--explain")
+    if explain is not None:
+        explain_videos(explain, Path(get_flag_value("--cache", str(VIDEO_CACHE))))
+        return
+
+    metrics_path = Path(get_flag_value("--metrics-json", str(METRICS_JSON)))
+    profiler = cProfile.Profile() if "--profile" in sys.argv else None
+    if "--trace" in sys.argv:
+        start_trace()
+    try:
+        if profiler:
+            profiler.runcall(run)
+        else:
+            run()
+    finally:
+        # Written even when the run exits early, so a failed night still leaves data.
+        # With --jobs each job saves its own (see _run_job_isolated), and the
+        # parent's empty metrics would overwrite the job using the same path.
+        if get_flag_value("--jobs") is None:
+            METRICS.save(metrics_path)
+            summary = METRICS.summary()
+            print(f"\nMétricas salvas em: {metrics_path}")
+            for name, seconds in summary["stages"].items():
+                print(f"    - {name}: {seconds:.2f}s")
+        if profiler:
+            PROFILE_STATS.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(PROFILE_STATS)
+            print(f"Perfil cProfile salvo em: {PROFILE_STATS}")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        if TRACE:
+            TRACE.save(TRACE_JSON, TRACE_STACKS, int(get_flag_value("--trace-top", str(TRACE_TOP))))
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Offline tests for fetch_ragnatales.py against local stub servers (no YouTube).
+
+Usage:
+    python -m unittest test_fetch_ragnatales   # ou: python -m pytest scripts
+"""
+
+import contextlib
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fetch_ragnatales as fr
+
+
+class StubServer:
+    """Serves `handler` on a free localhost port for the duration of a `with`."""
+
+    def __init__(self, handler: type[BaseHTTPRequestHandler]):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.requests = []
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+# ─── Classifier ───────────────────────────────────────────────────────────────
+
+class ClassifierTest(unittest.TestCase):
+    def decide(self, title: str, description: str = "") -> fr.Classification:
+        return fr.DEFAULT_CLASSIFIER.classify({"title": title, "description": description, "tags": []})
+
+    def test_committed_catalog_classifies_the_same(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(fr.verify_catalog(fr.OUTPUT_JSON), 0)
+
+    def test_short_alias_matches_whole_words_only(self):
+        self.assertEqual(self.decide("Build Mestre-Ferreiro de forja").class_name, "Mestre-Ferreiro")
+        self.assertEqual(self.decide("Build Mestre Ferreiro de forja").class_name, "Mestre-Ferreiro")
+        self.assertEqual(self.decide("Build Mestre combo").class_name, "Mestre")
+        self.assertIsNone(self.decide("Os mestres do PvP").class_name)
+        self.assertIsNone(self.decide("Bashing no PvP").class_name)
+
+    def test_last_token_runs_on(self):
+        self.assertEqual(self.decide("Dicas para arqueiros").class_name, "Atirador de Elite")
+        self.assertEqual(self.decide("Guias rápidos do servidor").content_category, "Guias Essenciais")
+
+    def test_accents_and_case_are_folded(self):
+        self.assertEqual(self.decide("Manual de Progressao").content_category, "Guias Essenciais")
+        self.assertEqual(self.decide("CAÇADOR OU CACADOR?").class_name, "Atirador de Elite")
+        self.assertEqual(self.decide("Build de clerigo").class_name, "Sumo Sacerdote")
+
+    def test_changelog_weighs_double(self):
+        video = {"title": "Changelog da semana: guia das novidades", "description": "", "tags": []}
+        self.assertEqual(fr.DEFAULT_CLASSIFIER.classify(video).content_category, "Patch Notes")
+        self.assertEqual(fr.DEFAULT_CLASSIFIER.explain(video)["categories"]["Patch Notes"], [("changelog", 6)])
+
+
+# ─── Thumbnails ───────────────────────────────────────────────────────────────
+
+class ThumbnailHandler(QuietHandler):
+    """maxresdefault with an ETag; a matching If-None-Match gets a 304.
+    Video "missing" only has YouTube's small placeholder."""
+
+    ETAG = '"v1"'
+
+    def do_HEAD(self):
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == self.ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.ETAG)
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.send_header("Content-Length", "1000" if "/missing/" in self.path else "50000")
+        self.end_headers()
+
+
+class ValidateThumbnailTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubServer(ThumbnailHandler).__enter__()
+        self.addCleanup(self.stub.__exit__)
+        self.url = fr.THUMBNAIL_URL
+        fr.THUMBNAIL_URL = self.stub.url + "/vi/{id}/{size}.jpg"
+        self.addCleanup(setattr, fr, "THUMBNAIL_URL", self.url)
+        fr.configure_rate_limits()
+        fr.METRICS = fr.RunMetrics()
+
+    def test_probe_keeps_validators(self):
+        entry = fr.validate_thumbnail("abc")
+        self.assertEqual(entry["urls"], [
+            f"{self.stub.url}/vi/abc/maxresdefault.jpg", f"{self.stub.url}/vi/abc/hqdefault.jpg",
+        ])
+        self.assertEqual(entry["etag"], ThumbnailHandler.ETAG)
+        self.assertEqual(entry["size"], 50000)
+
+    def test_placeholder_falls_back_to_hqdefault(self):
+        entry = fr.validate_thumbnail("missing")
+        self.assertEqual(entry["urls"], [f"{self.stub.url}/vi/missing/hqdefault.jpg"] * 2)
+
+    def test_revalidation_304_keeps_decision(self):
+        first = fr.validate_thumbnail("abc")
+        first["checkedAt"] = 0
+        second = fr.validate_thumbnail("abc", entry=first)
+        self.assertEqual(self.stub.server.requests[-1][1], ThumbnailHandler.ETAG)
+        self.assertEqual(second["urls"], first["urls"])
+        self.assertGreater(second["checkedAt"], 0)
+        self.assertEqual(fr.METRICS.counters.get("thumbnail_not_modified"), 1)
+
+    def test_error_keeps_last_decision(self):
+        previous = {"urls": ["a", "b"], "checkedAt": 0, "etag": None, "lastModified": None}
+        fr.THUMBNAIL_URL = "http://127.0.0.1:9/vi/{id}/{size}.jpg"
+        self.assertIs(fr.validate_thumbnail("abc", entry=previous), previous)
+
+    def test_thumbnail_cache_revalidates_after_ttl(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cache = fr.ThumbnailCache(fr.Path(tmp.name) / "thumbnails.json", ttl_days=0)
+        cache.store("abc", fr.validate_thumbnail("abc"))
+        self.assertIsNone(cache.lookup("abc"))
+        resolved = fr.resolve_thumbnails(["abc"], workers=1, cache=cache)
+        self.assertEqual(resolved["abc"][0], f"{self.stub.url}/vi/abc/maxresdefault.jpg")
+        self.assertEqual(self.stub.server.requests[-1][1], ThumbnailHandler.ETAG)
+
+
+# ─── Watch ────────────────────────────────────────────────────────────────────
+
+FEED_ENTRY = """<entry>
+  <yt:videoId>{id}</yt:videoId>
+  <title>{title}</title>
+  <media:group><media:description>{description}</media:description></media:group>
+</entry>"""
+
+
+class FeedHandler(ThumbnailHandler):
+    """GET serves an Atom feed of `server.entries`; HEAD serves thumbnails."""
+
+    def do_GET(self):
+        entries = "".join(FEED_ENTRY.format(**entry) for entry in self.server.entries)
+        body = (
+            '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:yt="http://www.youtube.com/xml/schemas/2015"'
+            f' xmlns:media="http://search.yahoo.com/mrss/">{entries}</feed>'
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class WatchTest(unittest.TestCase):
+    VIDEOS = [
+        {"id": "new1", "title": "Build Arcano RagnaTales", "description": "ragnatales arcano"},
+        {"id": "old1", "title": "Guia de refino RagnaTales", "description": "ragnatales refino"},
+    ]
+
+    def setUp(self):
+        self.stub = StubServer(FeedHandler).__enter__()
+        self.addCleanup(self.stub.__exit__)
+        self.stub.server.entries = list(self.VIDEOS[1:])
+        self.url = fr.THUMBNAIL_URL
+        fr.THUMBNAIL_URL = self.stub.url + "/vi/{id}/{size}.jpg"
+        self.addCleanup(setattr, fr, "THUMBNAIL_URL", self.url)
+        fr.configure_rate_limits()
+        fr.METRICS = fr.RunMetrics()
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.job = fr.ChannelJob.from_config(
+            {"name": "test", "channelUrl": "https://www.youtube.com/@test", "feedUrl": self.stub.url + "/feed"},
+            fr.Path(tmp.name),
+        )
+        # Metadata as if already fetched, so no poll needs yt-dlp
+        cache = fr.VideoCache(self.job.cache_dir / fr.VIDEO_CACHE.name)
+        for video in self.VIDEOS:
+            cache.put(video["id"], metadata={**video, "tags": [], "upload_date": "20250101"},
+                      fetchedAt=time.time())
+        cache.save()
+        self.options = fr.RunOptions(watch=True, watch_newest=5, workers=1, thumb_workers=1)
+        self.state = fr.WatchState(self.job.cache_dir / fr.WATCH_STATE.name)
+
+    def exported_ids(self) -> set[str]:
+        data = json.loads(self.job.output_json.read_text(encoding="utf-8"))
+        entries = [e for builds in data["classes"].values() for e in builds] + data["uncategorized"]
+        return {e["id"] for e in entries}
+
+    def test_poll_feed(self):
+        self.assertEqual(fr.poll_feed(self.stub.url + "/feed"), self.VIDEOS[1:])
+
+    def test_watch_once_only_acts_on_new_videos(self):
+        self.assertTrue(fr.watch_once(self.job, self.options, self.state))
+        self.assertEqual(self.exported_ids(), {"old1"})
+
+        self.assertFalse(fr.watch_once(self.job, self.options, self.state))
+        self.assertEqual(fr.METRICS.counters.get("watch_pending"), 1)
+
+        self.stub.server.entries.insert(0, self.VIDEOS[0])
+        self.assertTrue(fr.watch_once(self.job, self.options, self.state))
+        self.assertEqual(self.exported_ids(), {"new1", "old1"})
+        self.assertEqual(fr.METRICS.counters.get("watch_pending"), 2)
+        self.assertEqual(fr.METRICS.counters.get("watch_polls"), 3)
+
+    def test_failed_fetch_is_retried_next_poll(self):
+        upload = {"id": "fail1", "title": "Build Sicário RagnaTales", "description": "ragnatales sicario"}
+        record = fr.VideoRecord(**upload, tags=[], upload_date="20250102")
+        attempts = []
+
+        def fetch(video_ids, **kwargs):
+            ids = list(video_ids)
+            attempts.append(ids)
+            return [] if len(attempts) == 1 else [record]  # the first fetch fails
+
+        self.assertTrue(fr.watch_once(self.job, self.options, self.state))
+        self.stub.server.entries.insert(0, upload)
+        with mock.patch.object(fr, "fetch_full_metadata", fetch):
+            fr.watch_once(self.job, self.options, self.state)
+            self.assertNotIn("fail1", self.exported_ids())
+            self.assertTrue(fr.watch_once(self.job, self.options, self.state))
+        self.assertEqual(attempts, [["fail1"], ["fail1"]])
+        self.assertEqual(self.exported_ids(), {"fail1", "old1"})
+        self.assertFalse(fr.watch_once(self.job, self.options, self.state))
+
+
+# ─── Interrupts ───────────────────────────────────────────────────────────────
+
+class InterruptTest(unittest.TestCase):
+    def test_interrupt_cancels_queued_batches_and_keeps_running_ones(self):
+        calls = []
+
+        def fetch_batch(vid_ids, retries, journal=None):
+            calls.append(vid_ids)
+            time.sleep(0.2)
+            for vid_id in vid_ids:
+                journal.record("metadata", vid_id, {"id": vid_id})
+            return [fr.VideoRecord(id=vid_id) for vid_id in vid_ids]
+
+        def listing():
+            yield "a"
+            yield "b"
+            raise KeyboardInterrupt
+
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = fr.RunJournal(fr.Path(tmp) / "journal.jsonl")
+            with mock.patch.object(fr, "_fetch_metadata_batch", fetch_batch), \
+                    self.assertRaises(KeyboardInterrupt):
+                fr.fetch_full_metadata(listing(), workers=1, batch_size=1, journal=journal)
+            journal.close()
+            self.assertEqual(calls, [["a"]])
+            resumed = fr.RunJournal(journal.path, resume=True)
+            self.assertEqual(list(resumed.stage("metadata")), ["a"])
+            resumed.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -50,6 +50,14 @@ export interface DetailedBuild {
   stages: BuildStage[];
 }
 
+export interface ThumbnailImage {
+  src: string; // "/thumbnails/<hash>-card.webp"
+  type: string; // "image/webp", "image/avif"
+  size: 'card' | 'modal';
+  width: number;
+  height: number;
+}
+
 export interface BuildGuide {
   id: string;
   slug?: string;
@@ -61,6 +69,7 @@ export interface BuildGuide {
   description: string;
   imageUrl: string;
   fallbackImageUrl?: string;
+  images?: ThumbnailImage[]; // Mirrored derivatives (fetch_ragnatales.py --mirror-thumbnails)
   difficulty?: 'Easy' | 'Medium' | 'Hard';
   tags: string[];
   videoUrl?: string;